@@ -5,6 +5,7 @@ import functools
 import logging
 import random
 import secrets
+import time
 import warnings
 from argparse import Namespace
 from collections import Counter, deque, defaultdict
@@ -22,6 +23,7 @@ import Utils
 
 if TYPE_CHECKING:
     from entrance_rando import ERPlacementState
+    from generation_profiler import GenerationProfiler
     from rule_builder.rules import Rule
     from worlds import AutoWorld
 
@@ -69,6 +71,59 @@ class PlandoItemBlock:
     count: dict[str, int] = dataclasses.field(default_factory=dict)
 
 
+@dataclasses.dataclass
+class SphereSweep:
+    """
+    The spheres of all filled locations, as computed by MultiWorld.sweep_spheres.
+
+    Events are collected as soon as they are reachable, so each sphere contains what becomes reachable after checking
+    the sendable locations of all previous spheres.
+    """
+    state: CollectionState
+    """state after collecting everything reachable"""
+    sendable_spheres: list[set[Location]] = dataclasses.field(default_factory=list)
+    """same as MultiWorld.get_sendable_spheres, including the trailing unreachable locations"""
+    location_spheres: dict[Location, int] = dataclasses.field(default_factory=dict)
+    """sphere of each reached location, events belong to the sphere that could be reached after collecting them"""
+    collected_events: list[Location] = dataclasses.field(default_factory=list)
+    """event locations in the order they were collected"""
+    unreachable: set[Location] = dataclasses.field(default_factory=set)
+    """filled locations that could not be reached"""
+
+
+class _LocationFrontier:
+    """
+    Locations left to check in a sphere sweep. Location.can_reach fails as long as the parent region is unreachable,
+    so locations are only tested once their region has been reached instead of in every sphere.
+    """
+    __slots__ = ("waiting", "candidates")
+
+    waiting: Dict[Region, Set[Location]]
+    """locations in regions that were not reachable yet, by region"""
+    candidates: Set[Location]
+    """locations in reachable regions"""
+
+    def __init__(self, locations: Iterable[Location]) -> None:
+        self.waiting = defaultdict(set)
+        for location in locations:
+            self.waiting[location.parent_region].add(location)
+        self.candidates = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.candidates or self.waiting)
+
+    def pop_reachable(self, state: CollectionState) -> Set[Location]:
+        """Removes and returns all locations that can be reached with state."""
+        for region in [region for region in self.waiting if region.can_reach(state)]:
+            self.candidates |= self.waiting.pop(region)
+        reachable = {location for location in self.candidates if location.can_reach(state)}
+        self.candidates -= reachable
+        return reachable
+
+    def remaining(self) -> Set[Location]:
+        return self.candidates.union(*self.waiting.values())
+
+
 class MultiWorld():
     debug_types = False
     player_name: Dict[int, str]
@@ -77,6 +132,12 @@ class MultiWorld():
     regions: RegionManager
     itempool: List[Item]
     is_race: bool = False
+    isolated_stage_workers: int = 1
+    """
+    Amount of threads to run the isolated stages of worlds with World.isolated_stages set in. 1 runs them in order.
+    """
+    profiler: Optional[GenerationProfiler] = None
+    """Collects timings while generating, when generating with --profile."""
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
 
@@ -591,23 +652,17 @@ class MultiWorld():
         unreachable locations.
         """
         state = CollectionState(self)
-        locations = set(self.get_filled_locations())
+        locations = _LocationFrontier(self.get_filled_locations())
 
         while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = locations.pop_reachable(state)
             yield sphere
             if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
+                yield locations.remaining()  # unreachable locations
                 break
 
             for location in sphere:
                 state.collect(location.item, True, location)
-            locations -= sphere
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -616,46 +671,60 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
+        yield from self.sweep_spheres().sendable_spheres
+
+    def sweep_spheres(self) -> SphereSweep:
+        """
+        Sweeps through all filled locations once, recording the sphere each location was reached in.
+
+        Output uses a single sweep for the multidata spheres, the accessibility check and the playthrough,
+        so this should only be called once the placements are final.
+        """
         state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
+        sweep = SphereSweep(state)
+        sendable: List[Location] = []
+        non_sendable: List[Location] = []
         for location in self.get_filled_locations():
             if type(location.item.code) is int and type(location.address) is int:
-                locations.add(location)
+                sendable.append(location)
             else:
-                events.add(location)
+                non_sendable.append(location)
+        locations = _LocationFrontier(sendable)
+        events = _LocationFrontier(non_sendable)
 
-        while locations:
-            sphere: Set[Location] = set()
+        while True:
+            sphere_number = len(sweep.sendable_spheres)
 
             # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
+            while done_events := events.pop_reachable(state):
+                for event in done_events:
+                    state.collect(event.item, True, event)
+                    sweep.location_spheres[event] = sphere_number
+                    sweep.collected_events.append(event)
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            if not locations:
+                break
 
-            yield sphere
+            sphere = locations.pop_reachable(state)
+            sweep.sendable_spheres.append(sphere)
             if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
+                sweep.sendable_spheres.append(locations.remaining())  # unreachable locations
                 break
 
             for location in sphere:
                 state.collect(location.item, True, location)
-            locations -= sphere
+                sweep.location_spheres[location] = sphere_number
 
-    def fulfills_accessibility(self, state: Optional[CollectionState] = None):
-        """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
+        sweep.unreachable = locations.remaining() | events.remaining()
+        return sweep
+
+    def fulfills_accessibility(self, state: Optional[CollectionState] = None,
+                               sphere_sweep: Optional[SphereSweep] = None):
+        """
+        Check if accessibility rules are fulfilled with current or supplied state.
+
+        If a sphere_sweep of the current placements is supplied instead of a state, its result is used without sweeping.
+        """
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -683,6 +752,32 @@ class MultiWorld():
                 return False  # still locations required to be collected
             return True
 
+        def inaccessible() -> bool:
+            if __debug__:
+                from Fill import FillError
+                raise FillError(
+                    f"Could not access required locations for accessibility check. Missing: {locations}",
+                    multiworld=self,
+                )
+            # ran out of places and did not finish yet, quit
+            logging.warning(f"Could not access required locations for accessibility check."
+                            f" Missing: {locations}")
+            return False
+
+        if sphere_sweep and not state:
+            # unfilled locations are not part of the sweep, but still have to be reachable with everything collected
+            locations = [location for location in self.get_locations() if location_relevant(location) and
+                         location not in sphere_sweep.location_spheres and
+                         (location.item or not location.can_reach(sphere_sweep.state))]
+            beatable_fulfilled = self.has_beaten_game(sphere_sweep.state)
+            if all_done():
+                return True
+            if locations:
+                return inaccessible()
+            return False
+
+        if not state:
+            state = CollectionState(self)
         locations = [location for location in self.get_locations() if location_relevant(location)]
 
         while locations:
@@ -692,16 +787,7 @@ class MultiWorld():
                     sphere.append(locations.pop(n))
 
             if not sphere:
-                if __debug__:
-                    from Fill import FillError
-                    raise FillError(
-                        f"Could not access required locations for accessibility check. Missing: {locations}",
-                        multiworld=self,
-                    )
-                # ran out of places and did not finish yet, quit
-                logging.warning(f"Could not access required locations for accessibility check."
-                                f" Missing: {locations}")
-                return False
+                return inaccessible()
 
             for location in sphere:
                 if location.item:
@@ -717,6 +803,118 @@ class MultiWorld():
 
 
 PathValue = Tuple[str, Optional["PathValue"]]
+EntranceReads = Tuple[Tuple[Tuple[Tuple[int, str], int], ...], Tuple["Region", ...]]
+"""Item counts and unreachable regions an Entrance's access rule read while it was evaluated to be blocked."""
+
+
+class _StateReadRecorder:
+    """
+    Temporarily stands in for a CollectionState's `prog_items` and `reachable_regions` while an access rule is
+    evaluated, recording the item counts and regions it reads. Anything read in a way that cannot be recorded, such as
+    iterating all items of a player, makes the reads untracked.
+    """
+    __slots__ = ("prog_items", "reachable_regions", "item_reads", "unreachable_region_reads", "untracked")
+
+    def __init__(self, state: CollectionState) -> None:
+        self.prog_items = _ReadRecordingMapping(self, state.prog_items, _ItemReadRecorder)
+        self.reachable_regions = _ReadRecordingMapping(self, state.reachable_regions, _RegionReadRecorder)
+        self.item_reads: Dict[Tuple[int, str], int] = {}
+        self.unreachable_region_reads: Set[Region] = set()
+        self.untracked = False
+
+    def reads(self) -> Optional[EntranceReads]:
+        if self.untracked:
+            return None
+        return tuple(self.item_reads.items()), tuple(self.unreachable_region_reads)
+
+
+class _ReadRecordingMapping:
+    __slots__ = ("recorder", "data", "view_type")
+
+    def __init__(self, recorder: _StateReadRecorder, data: Dict[int, Any], view_type: type) -> None:
+        self.recorder = recorder
+        self.data = data
+        self.view_type = view_type
+
+    def __getitem__(self, player: int) -> Any:
+        return self.view_type(self.recorder, self.data[player], player)
+
+    def __setitem__(self, player: int, value: Any) -> None:
+        self.recorder.untracked = True
+        self.data[player] = value
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untracked = True
+        return getattr(self.data, name)
+
+    def __iter__(self):
+        self.recorder.untracked = True
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class _ItemReadRecorder:
+    __slots__ = ("recorder", "counter", "player")
+
+    def __init__(self, recorder: _StateReadRecorder, counter: Counter[str], player: int) -> None:
+        self.recorder = recorder
+        self.counter = counter
+        self.player = player
+
+    def __getitem__(self, item: str) -> int:
+        count = self.counter[item]
+        self.recorder.item_reads[self.player, item] = count
+        return count
+
+    def __contains__(self, item: str) -> bool:
+        self.recorder.item_reads[self.player, item] = self.counter[item]
+        return item in self.counter
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self.recorder.item_reads[self.player, item] = self.counter[item]
+        return self.counter.get(item, default)
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untracked = True
+        return getattr(self.counter, name)
+
+    def __iter__(self):
+        self.recorder.untracked = True
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.recorder.untracked = True
+        return len(self.counter)
+
+
+class _RegionReadRecorder:
+    __slots__ = ("recorder", "regions", "player")
+
+    def __init__(self, recorder: _StateReadRecorder, regions: Set[Region], player: int) -> None:
+        self.recorder = recorder
+        self.regions = regions
+        self.player = player
+
+    def __contains__(self, region: Region) -> bool:
+        if region in self.regions:
+            # reachable regions only get lost through CollectionState.remove, which discards all recorded reads
+            return True
+        self.recorder.unreachable_region_reads.add(region)
+        return False
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untracked = True
+        return getattr(self.regions, name)
+
+    def __iter__(self):
+        self.recorder.untracked = True
+        return iter(self.regions)
+
+    def __len__(self) -> int:
+        self.recorder.untracked = True
+        return len(self.regions)
 
 
 class CollectionState():
@@ -724,6 +922,12 @@ class CollectionState():
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
+    entrance_reads: Dict[int, Dict[Entrance, Optional[EntranceReads]]]
+    """What each blocked Entrance's access rule read when it was last evaluated, for worlds using
+    entrance_dependency_tracking. None if the reads could not be tracked."""
+    owned_region_caches: Set[int]
+    """Players whose reachable_regions, blocked_connections and entrance_reads are not shared with a copy of this
+    state. The caches of all other players have to be copied before they can be modified."""
     advancements: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
@@ -739,6 +943,8 @@ class CollectionState():
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.entrance_reads = {player: {} for player in parent.get_all_ids()}
+        self.owned_region_caches = set(parent.get_all_ids())
         self.advancements = set()
         self.path = {}
         self.locations_checked = set()
@@ -752,6 +958,7 @@ class CollectionState():
 
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        self._own_region_caches(player)
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
         queue = deque(self.blocked_connections[player])
@@ -765,6 +972,8 @@ class CollectionState():
 
         if world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
+        elif world.entrance_dependency_tracking:
+            self._update_reachable_regions_tracked_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
 
@@ -821,21 +1030,100 @@ class CollectionState():
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
             queue.extend(blocked_connections)
 
+    def _update_reachable_regions_tracked_indirect_conditions(self, player: int, queue: deque[Entrance]):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        entrance_reads = self.entrance_reads[player]
+        # only check connections that have not been evaluated yet or whose access rule may evaluate differently now
+        queue = deque(connection for connection in queue
+                      if self._entrance_reads_changed(entrance_reads.get(connection)))
+        new_connection: bool = True
+        # run BFS on all connections, and keep track of those blocked by missing items
+        while new_connection:
+            new_connection = False
+            while queue:
+                connection = queue.popleft()
+                new_region = connection.connected_region
+                if new_region in reachable_regions:
+                    blocked_connections.remove(connection)
+                    entrance_reads.pop(connection, None)
+                elif self._can_reach_recording_reads(connection, entrance_reads):
+                    if self.allow_partial_entrances and not new_region:
+                        continue
+                    assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                    reachable_regions.add(new_region)
+                    blocked_connections.remove(connection)
+                    blocked_connections.update(new_region.exits)
+                    queue.extend(new_region.exits)
+                    self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                    new_connection = True
+                    self.multiworld.worlds[player].reached_region(self, new_region)
+            # retry only the blocked connections whose access rules read something that has changed since
+            queue.extend(connection for connection in blocked_connections
+                         if self._entrance_reads_changed(entrance_reads.get(connection)))
+
+    def _can_reach_recording_reads(self, connection: Entrance,
+                                   entrance_reads: Dict[Entrance, Optional[EntranceReads]]) -> bool:
+        recorder = _StateReadRecorder(self)
+        prog_items, reachable_regions = self.prog_items, self.reachable_regions
+        self.prog_items, self.reachable_regions = recorder.prog_items, recorder.reachable_regions  # type: ignore
+        try:
+            reachable = connection.can_reach(self)
+        finally:
+            self.prog_items, self.reachable_regions = prog_items, reachable_regions
+        if reachable:
+            entrance_reads.pop(connection, None)
+        else:
+            entrance_reads[connection] = recorder.reads()
+        return reachable
+
+    def _entrance_reads_changed(self, reads: Optional[EntranceReads]) -> bool:
+        if reads is None:
+            return True
+        item_reads, unreachable_region_reads = reads
+        prog_items = self.prog_items
+        for (player, item), count in item_reads:
+            if prog_items[player][item] != count:
+                return True
+        for region in unreachable_region_reads:
+            if region.can_reach(self):
+                return True
+        return False
+
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        # Counter.copy() goes through the pure Python Counter.__init__ and Counter.update,
+        # filling an empty one is faster.
+        ret.prog_items = {}
+        for player, counter in self.prog_items.items():
+            ret.prog_items[player] = counter_copy = Counter()
+            dict.update(counter_copy, counter)
+        # The per-player region caches are shared with the copy until either state has to modify them for a player.
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
+        ret.entrance_reads = self.entrance_reads.copy()
+        ret.owned_region_caches = set()
+        self.owned_region_caches.clear()
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        ret.stale = self.stale.copy()
         ret.allow_partial_entrances = self.allow_partial_entrances
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
 
+    def _own_region_caches(self, player: int) -> None:
+        """Makes sure the region caches of player are not shared with another state, so they can be modified."""
+        if player not in self.owned_region_caches:
+            self.reachable_regions[player] = self.reachable_regions[player].copy()
+            self.blocked_connections[player] = self.blocked_connections[player].copy()
+            self.entrance_reads[player] = self.entrance_reads[player].copy()
+            self.owned_region_caches.add(player)
+
     def can_reach(self,
                   spot: Union[Location, Entrance, Region, str],
                   resolution_hint: Optional[str] = None,
@@ -988,24 +1276,30 @@ class CollectionState():
             # Return a generator that will yield at the end of each sweep iteration.
             return self._sweep_for_advancements_impl(advancements_per_player, True)
         else:
+            profiler = self.multiworld.profiler
+            start = time.perf_counter() if profiler else 0.0
             # Create the generator, but tell it not to yield anything, so it will run to completion in zero iterations
             # once started, then start and exhaust the generator by attempting to iterate it.
             for _ in self._sweep_for_advancements_impl(advancements_per_player, False):
                 assert False, "Generator yielded when it should have run to completion without yielding"
+            if profiler:
+                profiler.record_sweep(time.perf_counter() - start)
             return None
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        return self.prog_items[player].get(item, 0) >= count
 
     # for loops are specifically used in all/any/count methods, instead of all()/any()/sum(), to avoid the overhead of
     # creating and iterating generator instances. In `return all(player_prog_items[item] for item in items)`, the
     # argument to all() would be a new generator instance, for example.
+    # Counts are read with `.get(item, 0)` instead of `[item]`, because a Counter calls its pure Python __missing__ for
+    # every item that is not in state, which is most items most of the time.
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
         player_prog_items = self.prog_items[player]
         for item in items:
-            if not player_prog_items[item]:
+            if not player_prog_items.get(item, 0):
                 return False
         return True
 
@@ -1013,7 +1307,7 @@ class CollectionState():
         """Returns True if at least one item name of items is in state at least once."""
         player_prog_items = self.prog_items[player]
         for item in items:
-            if player_prog_items[item]:
+            if player_prog_items.get(item, 0):
                 return True
         return False
 
@@ -1021,7 +1315,7 @@ class CollectionState():
         """Returns True if each item name is in the state at least as many times as specified."""
         player_prog_items = self.prog_items[player]
         for item, count in item_counts.items():
-            if player_prog_items[item] < count:
+            if player_prog_items.get(item, 0) < count:
                 return False
         return True
 
@@ -1029,19 +1323,19 @@ class CollectionState():
         """Returns True if at least one item name is in the state at least as many times as specified."""
         player_prog_items = self.prog_items[player]
         for item, count in item_counts.items():
-            if player_prog_items[item] >= count:
+            if player_prog_items.get(item, 0) >= count:
                 return True
         return False
 
     def count(self, item: str, player: int) -> int:
-        return self.prog_items[player][item]
+        return self.prog_items[player].get(item, 0)
 
     def has_from_list(self, items: Iterable[str], player: int, count: int) -> bool:
         """Returns True if the state contains at least `count` items matching any of the item names from a list."""
         found: int = 0
         player_prog_items = self.prog_items[player]
         for item_name in items:
-            found += player_prog_items[item_name]
+            found += player_prog_items.get(item_name, 0)
             if found >= count:
                 return True
         return False
@@ -1052,7 +1346,7 @@ class CollectionState():
         found: int = 0
         player_prog_items = self.prog_items[player]
         for item_name in items:
-            found += player_prog_items[item_name] > 0
+            found += player_prog_items.get(item_name, 0) > 0
             if found >= count:
                 return True
         return False
@@ -1062,7 +1356,7 @@ class CollectionState():
         player_prog_items = self.prog_items[player]
         total = 0
         for item_name in items:
-            total += player_prog_items[item_name]
+            total += player_prog_items.get(item_name, 0)
         return total
 
     def count_from_list_unique(self, items: Iterable[str], player: int) -> int:
@@ -1070,7 +1364,7 @@ class CollectionState():
         player_prog_items = self.prog_items[player]
         total = 0
         for item_name in items:
-            if player_prog_items[item_name] > 0:
+            if player_prog_items.get(item_name, 0) > 0:
                 total += 1
         return total
 
@@ -1080,7 +1374,7 @@ class CollectionState():
         found: int = 0
         player_prog_items = self.prog_items[player]
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += player_prog_items[item_name]
+            found += player_prog_items.get(item_name, 0)
             if found >= count:
                 return True
         return False
@@ -1092,7 +1386,7 @@ class CollectionState():
         found: int = 0
         player_prog_items = self.prog_items[player]
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += player_prog_items[item_name] > 0
+            found += player_prog_items.get(item_name, 0) > 0
             if found >= count:
                 return True
         return False
@@ -1101,7 +1395,7 @@ class CollectionState():
         """Returns the cumulative count of items from an item group present in state."""
         player_prog_items = self.prog_items[player]
         return sum(
-            player_prog_items[item_name]
+            player_prog_items.get(item_name, 0)
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
         )
 
@@ -1110,7 +1404,7 @@ class CollectionState():
         Ignores duplicates of the same item."""
         player_prog_items = self.prog_items[player]
         return sum(
-            player_prog_items[item_name] > 0
+            player_prog_items.get(item_name, 0) > 0
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
         )
 
@@ -1145,6 +1439,9 @@ class CollectionState():
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            for player in self.entrance_reads:
+                self.entrance_reads[player] = {}
+            self.owned_region_caches.add(item.player)
             self.stale[item.player] = True
 
     def remove_item(self, item: str, player: int, count: int = 1) -> None:
@@ -1699,23 +1996,40 @@ class Spoiler:
             self.entrances[(entrance, direction, player)] = \
                 {"player": player, "entrance": entrance, "exit": exit_, "direction": direction}
 
-    def create_playthrough(self, create_paths: bool = True) -> None:
+    def create_playthrough(self, create_paths: bool = True, sphere_sweep: Optional[SphereSweep] = None) -> None:
         """Destructive to the multiworld while it is run, damage gets repaired afterwards."""
         from itertools import chain
         # get locations containing progress items
         multiworld = self.multiworld
+        if not sphere_sweep:
+            sphere_sweep = multiworld.sweep_spheres()
         prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
+        unreachables = prog_locations & sphere_sweep.unreachable
+        if unreachables:
+            logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                location.item.name, location.item.player, location.name, location.player) for location in
+                                                                           unreachables])
+            if not multiworld.has_beaten_game(sphere_sweep.state):
+                raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
+                                   "Something went terribly wrong here. "
+                                   f"Unreachable progression items: {unreachables}")
+            self.unreachables = unreachables
+
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
+        # the sweep already knows which of them are reachable, so this never has to run into an empty sphere
+        sphere_candidates = prog_locations - unreachables
         logging.debug('Building up collection spheres.')
         while sphere_candidates:
 
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
+            # Not taken from the sweep, which collects events eagerly and would give a coarser order to cull in.
 
             sphere = {location for location in sphere_candidates if state.can_reach(location)}
+            if not sphere:
+                raise RuntimeError(f"Not all required items reachable. Unreachable locations: {sphere_candidates}")
 
             for location in sphere:
                 state.collect(location.item, True, location)
@@ -1727,17 +2041,6 @@ class Spoiler:
             logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
                           len(sphere),
                           len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if not multiworld.has_beaten_game(state):
-                    raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
-                                       "Something went terribly wrong here. "
-                                       f"Unreachable progression items: {sphere_candidates}")
-                else:
-                    self.unreachables = sphere_candidates
-                    break
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
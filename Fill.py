@@ -1,6 +1,7 @@
 import collections
 import itertools
 import logging
+import time
 import typing
 from collections import Counter, deque
 
@@ -33,6 +34,65 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class _PlacementCandidates:
+    """
+    The locations left to fill in fill_restrictive, in their original order.
+
+    Filled locations are removed in constant time, single player placement only looks at the locations of the item's
+    player, and the reachability of a location is evaluated once per state instead of once per item tried there.
+    """
+    __slots__ = ("remaining", "by_player", "state", "reachable")
+
+    remaining: typing.Dict[Location, None]
+    by_player: typing.Dict[int, typing.Dict[Location, None]]
+    state: typing.Optional[CollectionState]
+    """the state locations are filled in, see set_state"""
+    reachable: typing.Dict[Location, bool]
+    """reachability of locations in state, for as long as state is not changed"""
+
+    def __init__(self, locations: typing.Iterable[Location]) -> None:
+        self.remaining = dict.fromkeys(locations)
+        self.by_player = collections.defaultdict(dict)
+        for location in self.remaining:
+            self.by_player[location.player][location] = None
+        self.state = None
+        self.reachable = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.remaining)
+
+    def set_state(self, state: CollectionState) -> None:
+        """Has the following placements check access in state. Has to be called again after state is changed."""
+        self.state = state
+        self.reachable = {}
+
+    def pop_fillable(self, item: Item, check_access: bool,
+                     single_player_placement: bool) -> typing.Optional[Location]:
+        """Removes and returns the first location that can be filled with item."""
+        for location in self.by_player[item.player] if single_player_placement else self.remaining:
+            if self._can_fill(location, item, check_access):
+                del self.remaining[location]
+                del self.by_player[location.player][location]
+                return location
+        return None
+
+    def _can_fill(self, location: Location, item: Item, check_access: bool) -> bool:
+        state = self.state
+        assert state, "set_state has to be called before filling"
+        if not check_access or type(location).can_fill is not Location.can_fill:
+            return location.can_fill(state, item, check_access)
+        # Location.can_fill only checks access once the item is allowed there, so for a reachable location it is the
+        # same without the access check, and an unreachable one can only be filled through always_allow.
+        reachable = self.reachable.get(location)
+        if reachable is None:
+            reachable = self.reachable[location] = location.can_reach(state)
+        if reachable:
+            return location.can_fill(state, item, False)
+        if location.always_allow is Location.always_allow:
+            return False
+        return location.can_fill(state, item, True)
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -59,11 +119,24 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
 
+    # `base_state` with every item that is assumed to still be collectable, that is `item_pool + unplaced_items`,
+    # already collected. It is kept up to date as items get placed or returned to the pool, so each placement round only
+    # needs to copy and sweep it, instead of collecting the entire remaining pool into a fresh copy of `base_state`.
+    assumed_state = base_state.copy()
+    for item in item_pool:
+        assumed_state.collect(item, True)
+
+    candidates = _PlacementCandidates(locations)
+
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
+    # for --profile
+    start = time.perf_counter()
+    rounds = 0
 
-    while any(reachable_items.values()) and locations:
+    while any(reachable_items.values()) and candidates:
+        rounds += 1
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -81,22 +154,24 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 if pool_item is item:
                     del item_pool[-p]
                     break
+            assumed_state.remove(item)
 
         maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
+            assumed_state, (), multiworld.get_filled_locations(item.player)
             if single_player_placement else None)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        candidates.set_state(maximum_exploration_state)
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not candidates:
                 unplaced_items += items_to_place
+                for unplaced_item in items_to_place:
+                    assumed_state.collect(unplaced_item, True)
                 break
             item_to_place = items_to_place.pop(0)
 
-            spot_to_fill: typing.Optional[Location] = None
-
             # if minimal accessibility, only check whether location is reachable if game not beatable
             if multiworld.worlds[item_to_place.player].options.accessibility == Accessibility.option_minimal:
                 perform_access_check = not multiworld.has_beaten_game(maximum_exploration_state,
@@ -105,15 +180,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill: typing.Optional[Location] = candidates.pop_fillable(
+                item_to_place, perform_access_check, single_player_placement)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
                     # Keep a cache of previous safe swap states that might be usable to sweep from to produce the next
@@ -180,6 +249,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                             reachable_items[placed_item.player].appendleft(
                                 placed_item)
                             item_pool.append(placed_item)
+                            assumed_state.collect(placed_item, True)
 
                             # cleanup at the end to hopefully get better errors
                             cleanup_required = True
@@ -193,9 +263,11 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     if spot_to_fill is None:
                         # Can't place this item, move on to the next
                         unplaced_items.append(item_to_place)
+                        assumed_state.collect(item_to_place, True)
                         continue
                 else:
                     unplaced_items.append(item_to_place)
+                    assumed_state.collect(item_to_place, True)
                     continue
             multiworld.push_item(spot_to_fill, item_to_place, False)
             spot_to_fill.locked = lock
@@ -209,6 +281,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    locations[:] = candidates.remaining
+
     if cleanup_required:
         # validate all placements and remove invalid ones
         state = sweep_from_pool(
@@ -221,6 +295,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 placement.item = None
                 locations.append(placement)
 
+    if multiworld.profiler:
+        multiworld.profiler.record_fill(name, time.perf_counter() - start, rounds, sum(swapped_items.values()),
+                                        placed, len(unplaced_items))
+
     if allow_excluded:
         # check if partial fill is the result of excluded locations, in which case retry
         excluded_locations = [
@@ -731,6 +809,54 @@ def flood_items(multiworld: MultiWorld) -> None:
                 break
 
 
+class _BalancingSphereIndex:
+    """
+    Spheres of a progression balancing pass, swept lazily from a snapshot of the balancing state.
+
+    The main balancing loop and every balancing attempt read their spheres from the same index instead of each
+    re-sweeping a copied state. Swapping items changes all spheres that have not been collected yet, so the index has
+    to be replaced after a sphere that moved items.
+    """
+    multiworld: MultiWorld
+    state: CollectionState
+    unchecked_locations: typing.Set[Location]
+    spheres: typing.List[typing.Set[Location]]
+    """locations of each sphere, starting with the one reachable from the snapshot"""
+    reachable_counts: typing.List[typing.Counter[int]]
+    """per sphere, the amount of unlocked locations it contains per player"""
+    beaten: typing.List[bool]
+    """per sphere, whether the game is beaten once that sphere and all before it are collected"""
+
+    def __init__(self, multiworld: MultiWorld, state: CollectionState,
+                 unchecked_locations: typing.Set[Location]) -> None:
+        self.multiworld = multiworld
+        self.state = state.copy()
+        self.unchecked_locations = unchecked_locations.copy()
+        self.spheres = []
+        self.reachable_counts = []
+        self.beaten = []
+
+    def sphere(self, number: int) -> typing.Set[Location]:
+        while len(self.spheres) <= number:
+            self._sweep_next()
+        return self.spheres[number]
+
+    def beaten_after(self, number: int) -> bool:
+        self.sphere(number + 1)
+        return self.beaten[number]
+
+    def _sweep_next(self) -> None:
+        if self.spheres:
+            for location in self.spheres[-1]:
+                if location.advancement:
+                    self.state.collect(location.item, True, location)
+            self.beaten.append(self.multiworld.has_beaten_game(self.state))
+        sphere = {location for location in self.unchecked_locations if self.state.can_reach(location)}
+        self.unchecked_locations -= sphere
+        self.spheres.append(sphere)
+        self.reachable_counts.append(Counter(location.player for location in sphere if not location.locked))
+
+
 def balance_multiworld_progression(multiworld: MultiWorld) -> None:
     # A system to reduce situations where players have no checks remaining, popularly known as "BK mode."
     # Overall progression balancing algorithm:
@@ -769,6 +895,9 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        # spheres from the current one onward, valid until progression balancing swaps items
+        sphere_index: typing.Optional[_BalancingSphereIndex] = None
+        index_sphere: int = 0
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
@@ -785,7 +914,10 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            if sphere_index is None:
+                sphere_index = _BalancingSphereIndex(multiworld, state, unchecked_locations)
+                index_sphere = 0
+            sphere_locations = sphere_index.sphere(index_sphere).copy()
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -815,16 +947,16 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
-                    balancing_unchecked_locations = unchecked_locations.copy()
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_sphere = sphere_locations
+                    balancing_sphere_num = index_sphere
+                    # Gather a set of locations which we can swap items into
+                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
                             if location.advancement:
-                                balancing_state.collect(location.item, True, location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -833,23 +965,20 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        balancing_sphere_num += 1
+                        balancing_sphere = sphere_index.sphere(balancing_sphere_num)
                         for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
-                            if not location.locked:
-                                balancing_reachables[location.player] += 1
-                        if multiworld.has_beaten_game(balancing_state) or all(
+                            unlocked_locations[location.player].add(location)
+                        for player, count in sphere_index.reachable_counts[balancing_sphere_num].items():
+                            balancing_reachables[player] += count
+                        balancing_beaten = sphere_index.beaten_after(balancing_sphere_num - 1)
+                        if balancing_beaten or all(
                                 item_percentage(player, reachables) >= threshold_percentages[player]
                                 for player, reachables in balancing_reachables.items()
                                 if player in threshold_percentages):
                             break
                         elif not balancing_sphere:
                             raise RuntimeError("Not all required items reachable. Something went terribly wrong here.")
-                    # Gather a set of locations which we can swap items into
-                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    for l in unchecked_locations:
-                        if l not in balancing_unchecked_locations:
-                            unlocked_locations[l.player].add(l)
                     items_to_replace: typing.List[Location] = []
                     for player in balancing_players:
                         locations_to_test = unlocked_locations[player]
@@ -867,7 +996,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                             reducing_state.sweep_for_advancements(locations=locations_to_test)
 
-                            if multiworld.has_beaten_game(balancing_state):
+                            if balancing_beaten:
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
                             else:
@@ -903,6 +1032,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
+                        sphere_index = None
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
                         for location in get_sphere_locations(state, unlocked):
                             unchecked_locations.remove(location)
@@ -914,6 +1044,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 if location.advancement:
                     state.collect(location.item, True, location)
             checked_locations |= sphere_locations
+            index_sphere += 1
 
             if multiworld.has_beaten_game(state):
                 break
@@ -57,6 +57,9 @@ def mystery_argparse(argv: list[str] | None = None) -> argparse.Namespace:
     parser.add_argument("--spoiler_only", action="store_true",
                         help="Skips generation assertion and multidata, outputting only a spoiler log. "
                              "Intended for debugging and testing purposes.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each generation stage, world, fill and access rule and add a report of it to the "
+                             "output. Access rules are slower to evaluate while being timed.")
     args = parser.parse_args(argv)
 
     if args.skip_output and args.spoiler_only:
@@ -7,7 +7,6 @@ import tempfile
 import time
 from typing import Any
 import zipfile
-import zlib
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
@@ -15,7 +14,7 @@ from Fill import FillError, balance_multiworld_progression, distribute_items_res
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
 from NetUtils import convert_to_base_types
 from Options import StartInventoryPool
-from Utils import __version__, output_path, restricted_dumps, version_tuple
+from Utils import __version__, output_path, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
 from worlds.generic.Rules import exclusion_rules, locality_rules
@@ -38,10 +37,15 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
     multiworld.plando_options = args.plando
+    multiworld.isolated_stage_workers = get_settings().generator.isolated_stage_workers
     multiworld.game = args.game.copy()
     multiworld.player_name = args.name.copy()
     multiworld.sprite = args.sprite.copy()
     multiworld.sprite_pool = args.sprite_pool.copy()
+    if args.profile:
+        from generation_profiler import GenerationProfiler
+        multiworld.profiler = GenerationProfiler(multiworld)
+        multiworld.profiler.begin_stage("set_options")
 
     multiworld.set_options(args)
     if args.csv_output:
@@ -73,6 +77,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if not args.skip_output and not args.spoiler_only:
         AutoWorld.call_stage(multiworld, "assert_generate")
 
+    profile_stage(multiworld, "generate_early")
     AutoWorld.call_all(multiworld, "generate_early")
 
     logger.info('')
@@ -109,12 +114,15 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld.worlds[1].options.local_items.value = set()
 
     logger.info('Creating MultiWorld.')
+    profile_stage(multiworld, "create_regions")
     AutoWorld.call_all(multiworld, "create_regions")
 
     logger.info('Creating Items.')
+    profile_stage(multiworld, "create_items")
     AutoWorld.call_all(multiworld, "create_items")
 
     logger.info('Calculating Access Rules.')
+    profile_stage(multiworld, "set_rules")
     AutoWorld.call_all(multiworld, "set_rules")
 
     for player in multiworld.player_ids:
@@ -141,7 +149,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     multiworld.plando_item_blocks = parse_planned_blocks(multiworld)
 
+    profile_stage(multiworld, "connect_entrances")
     AutoWorld.call_all(multiworld, "connect_entrances")
+    profile_stage(multiworld, "generate_basic")
     AutoWorld.call_all(multiworld, "generate_basic")
 
     # remove starting inventory from pool items.
@@ -185,35 +195,49 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld._all_state = None
 
     logger.info("Running Item Plando.")
+    profile_stage(multiworld, "item_plando")
     resolve_early_locations_for_planned(multiworld)
     distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
                                            for x in multiworld.plando_item_blocks[player]])
 
     logger.info('Running Pre Main Fill.')
+    profile_stage(multiworld, "pre_fill")
 
     AutoWorld.call_all(multiworld, "pre_fill")
 
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
+    profile_stage(multiworld, "fill")
+    if multiworld.profiler:
+        # only timed from here on, so that worlds still see their own access rules while they set them up
+        multiworld.profiler.instrument_rules()
 
     if multiworld.algorithm == 'flood':
         flood_items(multiworld)  # different algo, biased towards early game progress items
     elif multiworld.algorithm == 'balanced':
         distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
 
+    profile_stage(multiworld, "post_fill")
     AutoWorld.call_all(multiworld, 'post_fill')
 
+    profile_stage(multiworld, "progression_balancing")
     if multiworld.players > 1 and not args.skip_prog_balancing:
         balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
 
+    if multiworld.profiler:
+        multiworld.profiler.restore_rules()
+    profile_stage(multiworld, "finalize_multiworld")
     AutoWorld.call_all(multiworld, "finalize_multiworld")
+    profile_stage(multiworld, "pre_output")
     AutoWorld.call_all(multiworld, "pre_output")
 
     # we're about to output using multithreading, so we're removing the global random state to prevent accidental use
     multiworld.random.passthrough = False
 
     if args.skip_output:
+        if multiworld.profiler:
+            multiworld.profiler.write(output_path(), f"AP_{multiworld.seed_name}")
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
         return multiworld
 
@@ -223,18 +247,22 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if args.spoiler_only:
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
+            profile_stage(multiworld, "playthrough")
             multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         multiworld.spoiler.to_file(output_path('%s_Spoiler.txt' % outfilebase))
+        if multiworld.profiler:
+            multiworld.profiler.write(output_path(), outfilebase)
         logger.info('Done. Skipped multidata modification. Total time: %s', time.perf_counter() - start)
         return multiworld
 
+    profile_stage(multiworld, "output")
     output = tempfile.TemporaryDirectory()
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
         with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
-            check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
+            sphere_sweep_task = pool.submit(multiworld.sweep_spheres)
 
             output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
             for player in output_players:
@@ -321,7 +349,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
                 # get spheres -> filter address==None -> skip empty
                 spheres: list[dict[int, set[int]]] = []
-                for sphere in multiworld.get_sendable_spheres():
+                for sphere in sphere_sweep_task.result().sendable_spheres:
                     current_sphere: dict[int, set[int]] = collections.defaultdict(set)
                     for sphere_location in sphere:
                         current_sphere[sphere_location.player].add(sphere_location.address)
@@ -353,14 +381,13 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
+                serialized_multidata = NetUtils.encode_multidata(multidata)
 
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
                     f.write(serialized_multidata)
 
             output_file_futures.append(pool.submit(write_multidata))
-            if not check_accessibility_task.result():
+            if not multiworld.fulfills_accessibility(sphere_sweep=sphere_sweep_task.result()):
                 if not multiworld.can_beat_game():
                     raise FillError("Game appears as unbeatable. Aborting.", multiworld=multiworld)
                 else:
@@ -374,11 +401,16 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            profile_stage(multiworld, "playthrough")
+            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2,
+                                                  sphere_sweep=sphere_sweep_task.result())
 
         if args.spoiler:
             multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
 
+        if multiworld.profiler:
+            multiworld.profiler.write(temp_dir, outfilebase)
+
         zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
         logger.info(f"Creating final archive at {zipfilename}")
         with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
@@ -388,3 +420,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
+
+
+def profile_stage(multiworld: MultiWorld, name: str) -> None:
+    """Starts timing the next generation stage, if generating with --profile."""
+    if multiworld.profiler:
+        multiworld.profiler.begin_stage(name)
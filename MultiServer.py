@@ -44,7 +44,7 @@ import NetUtils
 import Utils
 from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text
 from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore, MultiData, Hint, HintStatus
+    SlotType, LocationStore, MultiData, MultiDataSections, Hint, HintStatus, multidata_format_version
 from BaseClasses import ItemClassification
 
 
@@ -140,6 +140,204 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+SaveChange = typing.Tuple[str, str, typing.Any, typing.Any]
+""" (operation, section, key, value) applied by SaveJournal.decode """
+
+
+class SaveJournal:
+    """
+    Keeps a savegame as a snapshot of Context.get_save(), followed by records of what changed since, so that saving
+    only has to serialize the changes. Every part is a zlib compressed pickle prefixed by its length.
+    The journal gets compacted into a new snapshot once the records add up to the size of the snapshot.
+    """
+    magic: typing.ClassVar[bytes] = b"APSJ"
+    append_sections: typing.ClassVar[typing.FrozenSet[str]] = frozenset(("received_items",))
+    """sections of lists that only ever get appended to"""
+    grow_sections: typing.ClassVar[typing.FrozenSet[str]] = frozenset(("location_checks",))
+    """sections of sets that only ever get added to"""
+    pair_sections: typing.ClassVar[typing.FrozenSet[str]] = frozenset(("client_activity_timers",
+                                                                       "client_connection_timers", "video"))
+    """sections saved as (key, value) pairs instead of as a dict"""
+    whole_sections: typing.ClassVar[typing.FrozenSet[str]] = frozenset(("random_state", "game_options"))
+    """sections that are recorded as a whole whenever they differ from what was last recorded"""
+
+    data: bytearray
+    """the complete savegame as it should be persisted"""
+    written_size: int
+    """how much of data was handed out by unwritten, 0 to have the next write start over"""
+    lock: threading.Lock
+    """held while changing data, so other threads can take what to write out of it"""
+    write_lock: threading.Lock
+    """held while writing, so that writes of different threads land in the order they were taken in"""
+    snapshot_size: int
+    _lengths: typing.Dict[str, typing.Dict[typing.Any, int]]
+    _values: typing.Dict[str, typing.Any]
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets what was recorded, so the next record starts over with a new snapshot."""
+        self.data = bytearray()
+        self.written_size = 0
+        self.snapshot_size = 0
+        self._lengths = {}
+        self._values = {}
+
+    @property
+    def needs_snapshot(self) -> bool:
+        """Whether there is no snapshot yet, or the records appended to it add up to its size."""
+        return not self.snapshot_size or len(self.data) - self.snapshot_size >= self.snapshot_size
+
+    @staticmethod
+    def _encode(obj: typing.Any) -> bytes:
+        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+        compressed = zlib.compress(pickle.dumps(obj))
+        return len(compressed).to_bytes(4, "little") + compressed
+
+    def snapshot(self, savedata: typing.Dict[str, typing.Any]) -> None:
+        """Starts over with savedata, the current output of Context.get_save(), as the snapshot."""
+        data = bytearray(self.magic + self._encode(savedata))
+        with self.lock:
+            self.data = data
+            self.written_size = 0
+        self.snapshot_size = len(data)
+        self._lengths = {section: {key: len(entries) for key, entries in savedata[section].items()}
+                         for section in self.append_sections | self.grow_sections if section in savedata}
+        self._values = {section: savedata[section] for section in self.whole_sections if section in savedata}
+
+    def append(self, changes: typing.List[SaveChange]) -> None:
+        """Appends a record of changes to the snapshot, if there are any."""
+        if changes:
+            record = self._encode(changes)
+            with self.lock:
+                self.data += record
+
+    def unwritten(self) -> typing.Tuple[bool, bytes]:
+        """
+        Returns whether data has to be written from scratch and the part of it that was not handed out yet,
+        which from then on counts as written. Call under write_lock and until the write succeeded.
+        """
+        with self.lock:
+            start_over = not self.written_size
+            data = bytes(self.data[self.written_size:])
+            self.written_size = len(self.data)
+        return start_over, data
+
+    def rewrite(self) -> None:
+        """Has the next write start over, for when a write failed and what was written may not match data anymore."""
+        with self.lock:
+            self.written_size = 0
+
+    def growth(self, section: str, value: typing.Mapping[typing.Any, typing.Sized]) -> typing.List[SaveChange]:
+        """
+        Returns the changes of a section of append_sections or grow_sections since it was last recorded,
+        telling them apart by the length of each entry.
+        """
+        lengths = self._lengths.setdefault(section, {})
+        changes: typing.List[SaveChange] = []
+        for key, entries in tuple(value.items()):
+            length = lengths.get(key, 0)
+            if len(entries) != length:
+                # entries may grow meanwhile, so only what was recorded counts towards the length
+                if section in self.append_sections:
+                    new_entries = entries[length:]
+                    changes.append(("extend", section, key, new_entries))
+                    lengths[key] = length + len(new_entries)
+                else:
+                    entries = set(entries)
+                    changes.append(("set", section, key, entries))
+                    lengths[key] = len(entries)
+        return changes
+
+    def replaced(self, section: str, value: typing.Any) -> typing.List[SaveChange]:
+        """
+        Returns the change of a section of whole_sections, if value differs from what was last recorded for it.
+        value must not be modified in place afterwards.
+        """
+        if section in self._values and self._values[section] == value:
+            return []
+        self._values[section] = value
+        return [("replace", section, None, value)]
+
+    @classmethod
+    def decode(cls, data: bytes) -> typing.Dict[str, typing.Any]:
+        """Turns a persisted savegame back into the output of Context.get_save()."""
+        data = bytes(data)  # some database drivers return memoryviews
+        if not data.startswith(cls.magic):
+            # saves from before journaling are a single pickle, zlib compressed in save files
+            return restricted_loads(zlib.decompress(data) if data[:1] == b"x" else data)
+
+        records: typing.List[typing.Any] = []
+        position = len(cls.magic)
+        while position + 4 <= len(data):
+            size = int.from_bytes(data[position:position + 4], "little")
+            position += 4
+            if position + size > len(data):
+                break  # cut off while appending, everything before it is still fine
+            records.append(restricted_loads(zlib.decompress(data[position:position + size])))
+            position += size
+
+        savedata: typing.Dict[str, typing.Any] = records[0]
+        for section in cls.pair_sections:
+            if section in savedata:
+                savedata[section] = dict(savedata[section])
+        for changes in records[1:]:
+            for operation, section, key, value in changes:
+                if operation == "replace":
+                    savedata[section] = value
+                elif operation == "extend":
+                    savedata[section].setdefault(key, []).extend(value)
+                elif operation == "set":
+                    savedata.setdefault(section, {})[key] = value
+                else:
+                    del savedata[section][key]
+        for section in cls.pair_sections:
+            if section in savedata:
+                savedata[section] = tuple(savedata[section].items())
+        return savedata
+
+
+class DataPackageCache:
+    """
+    Keeps the encoded data package of each game by its checksum, so that answering GetDataPackage only has to join
+    already encoded games. There is one per process, so WebHost rooms of the same games share their entries.
+    """
+    max_size: int
+    """how many encoded data packages to keep, dropping the least recently used ones first"""
+    _encoded: typing.OrderedDict[typing.Tuple[str, str], str]
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._encoded = collections.OrderedDict()
+
+    def encode_game(self, game: str, game_package: typing.Dict[str, typing.Any]) -> str:
+        checksum = game_package.get("checksum")
+        if checksum is None:
+            # data packages from before checksums can't be told apart, so they are not cached
+            return encode(game_package)
+        key = game, checksum
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            encoded = self._encoded[key] = encode(game_package)
+            if len(self._encoded) > self.max_size:
+                self._encoded.popitem(last=False)
+        else:
+            self._encoded.move_to_end(key)
+        return encoded
+
+    def encode_response(self, games: typing.Dict[str, typing.Dict[str, typing.Any]]) -> str:
+        """Returns the encoded DataPackage message for games, the same as encoding it with Context.dumper."""
+        encoded_games = ",".join(f"{encode(game)}:{self.encode_game(game, game_package)}"
+                                 for game, game_package in games.items())
+        return f'[{{"cmd":"DataPackage","data":{{"games":{{{encoded_games}}}}}}}]'
+
+
+data_package_cache = DataPackageCache()
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -229,7 +427,20 @@ class Context:
                       "compatibility": int}
     # team -> slot id -> list of clients authenticated to slot.
     clients: typing.Dict[int, typing.Dict[int, typing.List[Client]]]
+    game_clients: typing.Dict[int, typing.Dict[str, typing.Set[Client]]]
+    """ team -> game -> clients authenticated to a slot of that game, for routing Bounce """
+    tag_clients: typing.Dict[int, typing.Dict[str, typing.Set[Client]]]
+    """ team -> tag -> authenticated clients with that tag, for routing Bounce """
     endpoints: list[Client]
+    outgoing: typing.Dict[Endpoint, typing.List[str]]
+    """ encoded lists of messages waiting to be sent by flush_outgoing """
+    outgoing_later: typing.List[typing.Tuple[typing.Iterable[Endpoint], str]]
+    """ broadcasts that flush_outgoing queues behind everything else """
+    outgoing_flush_scheduled: bool = False
+    outgoing_frame_size: int = 0x10000
+    """ queued messages are joined into frames of up to about this size, the size of the compression window """
+    outgoing_buffer_limit: int = 0x1000000
+    """ clients with more bytes than this waiting to be written get disconnected, as they are not keeping up """
     locations: LocationStore  # typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
     hints_used: typing.Dict[typing.Tuple[int, int], int]
@@ -238,6 +449,10 @@ class Context:
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    stored_data_delta_clients: typing.Dict[str, typing.Set[Client]]
+    """ clients that receive only the operations of each Set of a key, see SetNotify's deltas """
+    stored_data_versions: typing.Dict[str, int]
+    """ how many times each key was Set since the server started, to let delta clients notice missed updates """
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -250,6 +465,8 @@ class Context:
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    location_spheres: typing.Dict[int, typing.Dict[int, int]]
+    """ { player: { location_id: sphere, ... } }, built from spheres """
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
@@ -261,7 +478,11 @@ class Context:
         self.slot_info = {}
         self.log_network = log_network
         self.endpoints = []
+        self.outgoing = {}
+        self.outgoing_later = []
         self.clients = {}
+        self.game_clients = collections.defaultdict(lambda: collections.defaultdict(set))
+        self.tag_clients = collections.defaultdict(lambda: collections.defaultdict(set))
         self.compatibility: int = compatibility
         self.shutdown_task = None
         self.data_filename = None
@@ -278,6 +499,7 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.new_item_receivers: typing.Set[team_slot] = set()  # received items not yet sent out by send_new_items
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -285,6 +507,8 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # the hints in the set of their finding player by (team, finding player, location), kept up to date with it
+        self.location_hints: typing.Dict[typing.Tuple[int, int, int], Hint] = {}
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -303,7 +527,9 @@ class Context:
         self.client_ids: typing.Dict[typing.Tuple[int, int], datetime.datetime] = {}
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None  # set to the loop init_save was called from
         self.save_dirty = False
+        self.save_journal = SaveJournal()
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -312,9 +538,14 @@ class Context:
         self.group_collected: typing.Dict[int, typing.Set[int]] = {}
         self.random = random.Random()
         self.stored_data = {}
+        # keys changed since the last save, by the section of get_save() they are saved in
+        self.save_changes: typing.DefaultDict[str, typing.Set[typing.Any]] = collections.defaultdict(set)
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_delta_clients = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_versions = {}
         self.read_data = {}
         self.spheres = []
+        self.location_spheres = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -344,9 +575,9 @@ class Context:
             self.non_hintable_names[world_name] = world.hint_blacklist
 
         for game_package in self.gamespackage.values():
-            # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            # remove groups from data sent to clients, the package is shared by all contexts in this process
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -375,49 +606,93 @@ class Context:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
     # General networking
+    def queue_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        """
+        Queues an encoded list of messages for endpoints. Everything queued for an endpoint until the end of the
+        current event loop iteration is sent together as one frame.
+        """
+        queued = False
+        for endpoint in endpoints:
+            if endpoint.socket and endpoint.socket.open:
+                self.outgoing.setdefault(endpoint, []).append(msg)
+                queued = True
+        if queued and not self.outgoing_flush_scheduled:
+            self.outgoing_flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush_outgoing)
+        return queued
+
+    def queue_encoded_msgs_later(self, endpoints: typing.Iterable[Endpoint], msg: str) -> None:
+        """
+        Queues an encoded list of messages for endpoints behind everything else that is sent in the current event loop
+        iteration, so a handler's reply still arrives ahead of the notifications and broadcasts it caused.
+        """
+        self.outgoing_later.append((endpoints, msg))
+        if not self.outgoing_flush_scheduled:
+            self.outgoing_flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush_outgoing)
+
+    def join_encoded_msgs(self, msgs: typing.List[str]) -> typing.Tuple[str, ...]:
+        """Joins encoded lists of messages into as few frames as fit outgoing_frame_size, keeping their order."""
+        if len(msgs) == 1:
+            return msgs[0],
+        frames: typing.List[str] = []
+        parts: typing.List[str] = []
+        size = 0
+        for msg in msgs:
+            if msg == "[]":
+                continue
+            if parts and size + len(msg) > self.outgoing_frame_size:
+                frames.append("[" + ",".join(parts) + "]")
+                parts = []
+                size = 0
+            # each msg is an encoded list of messages, so join their contents into one list
+            parts.append(msg[1:-1])
+            size += len(msg) - 1
+        frames.append("[" + ",".join(parts) + "]")
+        return tuple(frames)
+
+    def flush_outgoing(self) -> None:
+        """Sends all queued messages in as few frames per endpoint as possible, built once for endpoints that get the
+        same messages."""
+        outgoing_later, self.outgoing_later = self.outgoing_later, []
+        for endpoints, msg in outgoing_later:
+            self.queue_encoded_msgs(endpoints, msg)
+        self.outgoing_flush_scheduled = False
+        outgoing, self.outgoing = self.outgoing, {}
+        frames: typing.Dict[typing.Tuple[str, ...], typing.List[ServerConnection]] = {}
+        for endpoint, msgs in outgoing.items():
+            if not endpoint.socket.open:
+                # closed since its messages were queued, so clean it up like a failed send would
+                async_start(self.disconnect(endpoint))
+                continue
+            if endpoint.socket.transport.get_write_buffer_size() > self.outgoing_buffer_limit:
+                # sends don't wait for the client to receive them, so this is what keeps its buffer from growing forever
+                self.logger.warning(f"Disconnecting {endpoint.name if endpoint.auth else 'a client'}, "
+                                    "as it is not receiving what is sent to it.")
+                endpoint.socket.transport.abort()
+                async_start(self.disconnect(endpoint))
+                continue
+            frames.setdefault(self.join_encoded_msgs(msgs), []).append(endpoint.socket)
+        for endpoint_frames, sockets in frames.items():
+            for frame in endpoint_frames:
+                try:
+                    websockets.broadcast(sockets, frame)
+                except RuntimeError:
+                    self.logger.exception("Exception during flush_outgoing")
+                else:
+                    if self.log_network:
+                        self.logger.info(f"Outgoing message: {frame}")
+
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
-        try:
-            await endpoint.socket.send(msg)
-        except websockets.ConnectionClosed:
-            self.logger.exception(f"Exception during send_msgs, could not send {msg}")
-            await self.disconnect(endpoint)
-            return False
-        else:
-            if self.log_network:
-                self.logger.info(f"Outgoing message: {msg}")
-            return True
+        return self.queue_encoded_msgs((endpoint,), self.dumper(msgs))
 
     async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
-        if not endpoint.socket or not endpoint.socket.open:
-            return False
-        try:
-            await endpoint.socket.send(msg)
-        except websockets.ConnectionClosed:
-            self.logger.exception("Exception during send_encoded_msgs")
-            await self.disconnect(endpoint)
-            return False
-        else:
-            if self.log_network:
-                self.logger.info(f"Outgoing message: {msg}")
-            return True
+        return self.queue_encoded_msgs((endpoint,), msg)
 
     async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
-        sockets = []
-        for endpoint in endpoints:
-            if endpoint.socket and endpoint.socket.open:
-                sockets.append(endpoint.socket)
-        try:
-            websockets.broadcast(sockets, msg)
-        except RuntimeError:
-            self.logger.exception("Exception during broadcast_send_encoded_msgs")
-            return False
-        else:
-            if self.log_network:
-                self.logger.info(f"Outgoing broadcast: {msg}")
-            return True
+        return self.queue_encoded_msgs(endpoints, msg)
 
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
@@ -427,7 +702,7 @@ class Context:
             for endpoint in self.endpoints
             if endpoint.auth and not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.queue_encoded_msgs_later(endpoints, data)
 
     def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
         self.logger.info("Notice (all): %s" % text)
@@ -441,31 +716,62 @@ class Context:
             for endpoint in itertools.chain.from_iterable(self.clients[team].values())
             if not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.queue_encoded_msgs_later(endpoints, data)
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
         msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.queue_encoded_msgs_later(endpoints, msgs)
+
+    def index_client(self, client: Client) -> None:
+        """Adds an authenticated client to the Bounce routing indexes, by its current team, slot and tags."""
+        self.game_clients[client.team][self.games[client.slot]].add(client)
+        for tag in client.tags:
+            self.tag_clients[client.team][tag].add(client)
+
+    def unindex_client(self, client: Client) -> None:
+        """Removes a client from the Bounce routing indexes, before its team, slot or tags change."""
+        if client.team is None or client.slot is None:
+            return
+        self.game_clients[client.team][self.games[client.slot]].discard(client)
+        for tag in client.tags:
+            self.tag_clients[client.team][tag].discard(client)
+
+    def get_bounce_targets(self, team: int, games: typing.Iterable[str], tags: typing.Iterable[str],
+                           slots: typing.Iterable[int]) -> typing.Set[Client]:
+        """Returns the clients of team that a Bounce to any of games, tags or slots should reach."""
+        targets: typing.Set[Client] = set()
+        game_clients = self.game_clients.get(team, {})
+        for game in games:
+            targets.update(game_clients.get(game, ()))
+        tag_clients = self.tag_clients.get(team, {})
+        for tag in tags:
+            targets.update(tag_clients.get(tag, ()))
+        slot_clients = self.clients.get(team, {})
+        for slot in slots:
+            targets.update(slot_clients.get(slot, ()))
+        return targets
 
     async def disconnect(self, endpoint: Client):
-        if endpoint in self.endpoints:
-            self.endpoints.remove(endpoint)
+        if endpoint not in self.endpoints:
+            return  # already disconnected, e.g. by flush_outgoing before the receive loop noticed
+        self.endpoints.remove(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
+            self.unindex_client(endpoint)
         await on_client_disconnected(self, endpoint)
 
     def notify_client(self, client: Client, text: str, additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
         self.logger.info("Notice (Player %s in team %d): %s" % (client.name, client.team + 1, text))
-        async_start(self.send_msgs(client, [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}]))
+        self.queue_encoded_msgs_later((client,), self.dumper(
+            [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}]))
 
     def notify_client_multiple(self, client: Client, texts: typing.List[str], additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
-        async_start(self.send_msgs(client,
-                                   [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
-                                    for text in texts]))
+        self.queue_encoded_msgs_later((client,), self.dumper(
+            [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments} for text in texts]))
 
     # loading
     def load(self, multidatapath: str, use_embedded_server_options: bool = False):
@@ -486,10 +792,12 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: bytes) -> MultiData:
         format_version = data[0]
-        if format_version > 3:
+        if format_version > multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == multidata_format_version:
+            return typing.cast(MultiData, MultiDataSections.decode(data))
         return restricted_loads(zlib.decompress(data[1:]))
 
     def _load(self, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any],
@@ -535,10 +843,15 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        # popped, so the decoded locations are not kept around next to the LocationStore built from them
+        self.locations = LocationStore(decoded_obj.pop("locations"))
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        if isinstance(self.slot_data, MultiDataSections):
+            # slot_data is the only part kept after loading, the rest of the multidata can be freed
+            self.slot_data.detach()
+        for slot in self.slot_data:
+            # looked up when needed, as format 4 only decodes the slot_data of a slot when it's first accessed
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -548,6 +861,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.index_hints()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -578,6 +892,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.index_spheres()
 
     # saving
 
@@ -594,16 +909,68 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            self.record_save(compact=exit_save)
+            with self.save_journal.write_lock:
+                start_over, data = self.save_journal.unwritten()
+                try:
+                    with open(self.save_filename, "wb" if start_over else "ab") as f:
+                        f.write(data)
+                except Exception:
+                    self.save_journal.rewrite()
+                    raise
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
             return True
 
+    def record_save(self, compact: bool = False) -> bool:
+        """
+        Records the current state in save_journal.
+        The state is changed on the event loop, so called from any other thread, this waits for the loop to record it.
+        Returns True if it started over with a new snapshot, False if the changes got appended to it.
+        """
+        if self.loop and self.loop.is_running():
+            try:
+                running_loop: typing.Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is not self.loop:
+                async def record() -> bool:
+                    return self.record_save(compact)
+
+                return asyncio.run_coroutine_threadsafe(record(), self.loop).result()
+
+        self.recheck_hints()  # marks the hints it changes, so it has to run before taking save_changes
+        save_changes, self.save_changes = self.save_changes, collections.defaultdict(set)
+        if compact or self.save_journal.needs_snapshot:
+            self.save_journal.snapshot(self.get_save())
+            return True
+        self.save_journal.append(self.get_save_changes(save_changes))
+        return False
+
+    def get_save_changes(self, save_changes: typing.DefaultDict[str, typing.Set[typing.Any]]) \
+            -> typing.List[SaveChange]:
+        """
+        Returns what changed since the last record in save_journal: the entries named in save_changes, the growth of
+        received_items and location_checks and the sections that are saved as a whole, if they differ.
+        """
+        changes = self.save_journal.growth("received_items", self.received_items)
+        changes += self.save_journal.growth("location_checks", self.location_checks)
+        for section, keys in save_changes.items():
+            entries = getattr(self, section)
+            for key in keys:
+                if key in entries:
+                    value = entries[key]
+                    # timers are saved as timestamps
+                    changes.append(("set", section, key,
+                                    value.timestamp() if isinstance(value, datetime.datetime) else value))
+                else:
+                    changes.append(("del", section, key, None))
+        changes += self.save_journal.replaced("random_state", self.random.getstate())
+        changes += self.save_journal.replaced("game_options", self.get_game_options())
+        return changes
+
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
@@ -614,7 +981,7 @@ class Context:
                     else self.data_filename + '_' + 'apsave'
             try:
                 with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
+                    save_data = SaveJournal.decode(f.read())
                     self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
@@ -624,6 +991,10 @@ class Context:
 
     def _start_async_saving(self, atexit_save: bool = True):
         if not self.auto_saver_thread:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass  # not running on an event loop, so saving records from whichever thread it is called in
             def save_regularly():
                 # time.time() is platform dependent, so using the expensive datetime method instead
                 def get_datetime_second():
@@ -671,17 +1042,19 @@ class Context:
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
             "stored_data": self.stored_data,
-            "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
-                             "server_password": self.server_password, "password": self.password,
-                             "release_mode": self.release_mode,
-                             "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
-                             "countdown_mode": self.countdown_mode,
-                             "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
+            "game_options": self.get_game_options()
         }
 
         return d
 
+    def get_game_options(self) -> dict:
+        return {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
+                "server_password": self.server_password, "password": self.password,
+                "release_mode": self.release_mode,
+                "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
+                "countdown_mode": self.countdown_mode,
+                "item_cheat": self.item_cheat, "compatibility": self.compatibility}
+
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
@@ -690,6 +1063,7 @@ class Context:
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        self.index_hints()
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -748,6 +1122,9 @@ class Context:
                 new_hints.add(new_hint)
                 if hint == new_hint:
                     continue
+                self.save_changes["hints"].add((hint_team, hint_slot))
+                if hint.finding_player == hint_slot:
+                    self.location_hints[hint_team, hint_slot, hint.location] = new_hint
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -755,16 +1132,46 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes only the hints for the specified locations of team/slot, such as after they got checked.
+        If a set is passed for 'changed', each (team,slot) pair that has at least one hint modified will be added to it.
+        """
+        for location in locations:
+            hint = self.location_hints.get((team, slot, location))
+            if not hint:
+                continue
+            new_hint = hint.re_check(self, team)
+            if hint == new_hint:
+                continue
+            for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                if changed is not None:
+                    changed.add((team, player))
+                self.replace_hint(team, player, hint, new_hint)
+
+    def index_hints(self) -> None:
+        """Rebuilds location_hints from hints."""
+        self.location_hints = {(team, slot, hint.location): hint for (team, slot), hints in self.hints.items()
+                               for hint in hints if hint.finding_player == slot}
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
 
+    def index_spheres(self) -> None:
+        """Rebuilds location_spheres from spheres."""
+        self.location_spheres = {}
+        # in reverse, so the earliest sphere wins should a location be listed more than once
+        for i, sphere in reversed(list(enumerate(self.spheres))):
+            for player, location_ids in sphere.items():
+                self.location_spheres.setdefault(player, {}).update(dict.fromkeys(location_ids, i))
+
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
+            sphere = self.location_spheres.get(player, {}).get(location_id)
+            if sphere is not None:
+                return sphere
             raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
                            f"Location or player may not exist.")
         return -1
@@ -825,33 +1232,34 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.location_hints[team, hint.finding_player, hint.location] = hint
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
                         new_hint_events.add(player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
+        self.save_changes["hints"].update((team, slot) for slot in new_hint_events)
         for slot in new_hint_events:
             self.on_new_hint(team, slot)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
-                clients = filter(lambda c: not c.no_text, self.clients[team].get(slot, []))
+                clients = [client for client in self.clients[team].get(slot, []) if not client.no_text]
                 if not clients:
                     continue
                 client_hints = [datum[1] for datum in sorted(hint_data, key=lambda x: x[0].finding_player != slot)]
-                for client in clients:
-                    async_start(self.send_msgs(client, client_hints))
+                self.queue_encoded_msgs_later(clients, self.dumper(client_hints))
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
-                return hint
-        return None
+        return self.location_hints.get((team, finding_player, seeked_location))
     
     def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.save_changes["hints"].add((team, slot))
+            if new_hint.finding_player == slot:
+                self.location_hints[team, slot, new_hint.location] = new_hint
     
     # "events"
 
@@ -889,9 +1297,7 @@ def update_aliases(ctx: Context, team: int):
     cmd = ctx.dumper([{"cmd": "RoomUpdate",
                        "players": ctx.get_players_package()}])
 
-    for clients in ctx.clients[team].values():
-        for client in clients:
-            async_start(ctx.send_encoded_msgs(client, cmd))
+    ctx.queue_encoded_msgs_later(itertools.chain.from_iterable(ctx.clients[team].values()), cmd)
 
 
 async def server(websocket: "ServerConnection", path: str = "/", ctx: Context = None) -> None:
@@ -984,12 +1390,14 @@ async def on_client_joined(ctx: Context, client: Client):
                                   "It may stop working in the future. If you are a player, please report this to the "
                                   "client's developer.")
     ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+    ctx.save_changes["client_connection_timers"].add((client.team, client.slot))
 
 
 async def on_client_left(ctx: Context, client: Client):
     if len(ctx.clients[client.team][client.slot]) < 1:
         update_client_status(ctx, client, ClientStatus.CLIENT_UNKNOWN)
         ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.save_changes["client_connection_timers"].add((client.team, client.slot))
 
     version_str = '.'.join(str(x) for x in client.version)
 
@@ -1068,20 +1476,22 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Sends the items received since the last call to the connected clients of the slots that received them."""
+    receivers = ctx.new_item_receivers
+    ctx.new_item_receivers = set()
+    for team, slot in receivers:
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                ctx.queue_encoded_msgs_later((client,), ctx.dumper([{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1115,6 +1525,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.save_changes["group_collected"].add(group)
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -1129,6 +1540,7 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.new_item_receivers.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1139,6 +1551,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
     if new_locations:
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
+            ctx.save_changes["client_activity_timers"].add((team, slot))
 
         sortable: list[tuple[int, int, int, int]] = []
         for location in new_locations:
@@ -1173,7 +1586,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1650,12 +2063,14 @@ class ClientMessageProcessor(CommonCommandProcessor):
         if alias_name:
             alias_name = alias_name[:16].strip()
             self.ctx.name_aliases[self.client.team, self.client.slot] = alias_name
+            self.ctx.save_changes["name_aliases"].add((self.client.team, self.client.slot))
             self.output(f"Hello, {alias_name}")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
             return True
         elif (self.client.team, self.client.slot) in self.ctx.name_aliases:
             del (self.ctx.name_aliases[self.client.team, self.client.slot])
+            self.ctx.save_changes["name_aliases"].add((self.client.team, self.client.slot))
             self.output("Removed Alias")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
@@ -1675,6 +2090,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_item_receivers.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1692,9 +2108,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         points_available = get_client_points(self.ctx, self.client)
         cost = self.ctx.get_hint_cost(self.client.slot)
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.get_rechecked_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1786,6 +2200,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.save_changes["hints_used"].add((self.client.team, self.client.slot))
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1905,6 +2320,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             team, slot = ctx.connect_names[args['name']]
             if client.auth and client.team is not None and client.slot in ctx.clients[client.team]:
                 ctx.clients[team][slot].remove(client)  # re-auth, remove old entry
+                ctx.unindex_client(client)
                 if client.team != team or client.slot != slot:
                     client.auth = False  # swapping Team/Slot
             client.team = team
@@ -1914,6 +2330,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             ctx.clients[team][slot].append(client)
             client.version = args['version']
             client.tags = args['tags']
+            ctx.index_client(client)
             client.no_locations = bool(client.tags & _non_game_messages.keys())
             # set NoText for old PopTracker clients that predate the tag to save traffic
             client.no_text = "NoText" in client.tags or ("PopTracker" in client.tags and client.version < (0, 5, 1))
@@ -1944,21 +2361,14 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
         if "games" in args:
             games = {name: game_data for name, game_data in ctx.gamespackage.items()
                      if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
             games = {name: game_data for name, game_data in ctx.gamespackage.items()
                      if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = ctx.gamespackage
+        await ctx.send_encoded_msgs(client, data_package_cache.encode_response(games))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1986,7 +2396,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
             if "tags" in args:
                 old_tags = client.tags
+                ctx.unindex_client(client)
                 client.tags = args["tags"]
+                ctx.index_client(client)
                 if set(old_tags) != set(client.tags):
                     client.no_locations = bool(client.tags & _non_game_messages.keys())
                     client.no_text = "NoText" in client.tags or (
@@ -2147,17 +2559,11 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.messageprocessor(args["text"])
 
         elif cmd == "Bounce":
-            games = set(args.get("games", []))
-            tags = set(args.get("tags", []))
-            slots = set(args.get("slots", []))
+            targets = ctx.get_bounce_targets(client.team, set(args.get("games", [])), set(args.get("tags", [])),
+                                             set(args.get("slots", [])))
             args["cmd"] = "Bounced"
             msg = ctx.dumper([args])
-
-            for bounceclient in ctx.endpoints:
-                if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
-                                                         set(bounceclient.tags) & tags or
-                                                         bounceclient.slot in slots):
-                    await ctx.send_encoded_msgs(bounceclient, msg)
+            await ctx.broadcast_send_encoded_msgs(targets, msg)
 
         elif cmd == "Get":
             if "keys" not in args or type(args["keys"]) != list:
@@ -2179,18 +2585,34 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'Set', "original_cmd": cmd}])
                 return
+            key = args["key"]
             args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
+            targets = set(ctx.stored_data_notification_clients[key])
+            delta_targets = set(ctx.stored_data_delta_clients[key])
+            if args.get("want_reply", False) and client not in delta_targets:
+                targets.add(client)
+            existed = key in ctx.stored_data
+            value = ctx.stored_data.get(key, args.get("default", 0))
+            if targets or not existed:
+                args["original_value"] = copy.copy(value)
             args["slot"] = client.slot
             for operation in args["operations"]:
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
-            ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
-            if args.get("want_reply", False):
-                targets.add(client)
+            ctx.stored_data[key] = value
+            ctx.save_changes["stored_data"].add(key)
+            version = ctx.stored_data_versions[key] = ctx.stored_data_versions.get(key, 0) + 1
+            if delta_targets:
+                if existed:
+                    # delta clients apply the operations to their copy of the value instead
+                    delta = {name: arg for name, arg in args.items() if name != "original_value"}
+                else:
+                    # nothing to apply the operations to yet
+                    delta = {**args, "value": value}
+                delta["version"] = version
+                ctx.broadcast(delta_targets, [delta])
             if targets:
+                args["value"] = value
                 ctx.broadcast(targets, [args])
             ctx.save()
 
@@ -2199,8 +2621,24 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'SetNotify', "original_cmd": cmd}])
                 return
-            for key in args["keys"]:
-                ctx.stored_data_notification_clients[key].add(client)
+            if args.get("deltas", False):
+                replies = []
+                for key in args["keys"]:
+                    if isinstance(key, str) and key.startswith("_read_"):
+                        # special keys are not Set, so they don't have operations to send
+                        ctx.stored_data_notification_clients[key].add(client)
+                        continue
+                    ctx.stored_data_notification_clients[key].discard(client)
+                    ctx.stored_data_delta_clients[key].add(client)
+                    replies.append({"cmd": "SetReply", "key": key, "value": ctx.stored_data.get(key, None),
+                                    "version": ctx.stored_data_versions.get(key, 0)})
+                if replies:
+                    # queued like the deltas, so none that were queued before this reply can arrive after it
+                    ctx.broadcast([client], replies)
+            else:
+                for key in args["keys"]:
+                    ctx.stored_data_delta_clients[key].discard(client)
+                    ctx.stored_data_notification_clients[key].add(client)
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
@@ -2215,6 +2653,7 @@ def update_client_status(ctx: Context, client: Client, new_status: ClientStatus)
                 ctx.broadcast_text_all(f"Team #{client.team + 1} has completed all of their games! Congratulations!")
 
         ctx.client_game_state[client.team, client.slot] = new_status
+        ctx.save_changes["client_game_state"].add((client.team, client.slot))
         ctx.on_client_status_change(client.team, client.slot)
         ctx.save()
 
@@ -2274,12 +2713,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
                     if alias_name:
                         alias_name = alias_name.strip()[:15]
                         self.ctx.name_aliases[team, slot] = alias_name
+                        self.ctx.save_changes["name_aliases"].add((team, slot))
                         self.output(f"Named {player_name} as {alias_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
                         return True
                     else:
                         del (self.ctx.name_aliases[team, slot])
+                        self.ctx.save_changes["name_aliases"].add((team, slot))
                         self.output(f"Removed Alias for {player_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterator, Mapping, MutableMapping, Sequence
 import typing
 import enum
+import math
+import re
+import uuid
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
+try:
+    import orjson
+except ImportError:  # the json module is used instead
+    orjson = None
+
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, restricted_dumps, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -135,10 +144,6 @@ _encode = JSONEncoder(
 ).encode
 
 
-def encode(obj: typing.Any) -> str:
-    return _encode(_scan_for_TypedTuples(obj))
-
-
 def get_any_version(data: dict) -> Version:
     data = {key.lower(): value for key, value in data.items()}  # .NET version classes have capitalized keys
     return Version(int(data["major"]), int(data["minor"]), int(data["build"]))
@@ -170,7 +175,90 @@ def _object_hook(o: typing.Any) -> typing.Any:
     return o
 
 
-decode = JSONDecoder(object_hook=_object_hook).decode
+def _json_encode(obj: typing.Any) -> str:
+    return _encode(_scan_for_TypedTuples(obj))
+
+
+_json_decode = JSONDecoder(object_hook=_object_hook).decode
+
+
+def _orjson_default(obj: typing.Any) -> typing.Any:
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        data = obj._asdict()
+        data["class"] = obj.__class__.__name__
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError
+
+
+def _orjson_differs(obj: typing.Any) -> bool:
+    """Whether obj contains values that orjson encodes, but the json module encodes differently or rejects."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, uuid.UUID):
+        return True
+    if isinstance(obj, dict):
+        return any(_orjson_differs(key) or _orjson_differs(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return any(_orjson_differs(value) for value in obj)
+    return False
+
+
+_orjson_uuid = re.compile(rb'"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"')
+
+
+def _orjson_encode(obj: typing.Any) -> str:
+    try:
+        # dataclasses and datetimes are passed to _orjson_default, which rejects them like the json module does
+        data = orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+                            | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME)
+    except orjson.JSONEncodeError:
+        # integers beyond 64 bits and such, the json module either handles or rejects them the same as before
+        return _json_encode(obj)
+    if (b"null" in data or _orjson_uuid.search(data)) and _orjson_differs(obj):
+        # orjson writes NaN and Infinity as null and UUIDs as strings, the json module writes or rejects them as before
+        return _json_encode(obj)
+    return data.decode()
+
+
+def _apply_object_hook(obj: typing.Any) -> typing.Any:
+    if type(obj) is list:
+        for index, value in enumerate(obj):
+            if type(value) is dict or type(value) is list:
+                obj[index] = _apply_object_hook(value)
+        return obj
+    for key, value in obj.items():
+        if type(value) is dict or type(value) is list:
+            obj[key] = _apply_object_hook(value)
+    # _object_hook only converts dicts with a class
+    return _object_hook(obj) if "class" in obj else obj
+
+
+_long_digits = re.compile(r"\d{19}")
+
+
+def _orjson_decode(data: str) -> typing.Any:
+    if _long_digits.search(data):
+        # orjson turns integers beyond 64 bits into floats
+        return _json_decode(data)
+    try:
+        obj = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN, lone surrogates and such, the json module either handles or rejects them the same as before
+        return _json_decode(data)
+    # most messages don't contain any objects for _object_hook to convert, those don't need to be walked
+    if '"class"' in data or "\\u" in data:
+        obj = _apply_object_hook(obj) if type(obj) in (list, dict) else obj
+    return obj
+
+
+if orjson:
+    encode = _orjson_encode
+    decode = _orjson_decode
+else:
+    encode = _json_encode
+    decode = _json_decode
 
 
 class Endpoint:
@@ -414,9 +502,17 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+_ReceiverIndex = typing.Dict[int, typing.Dict[int, typing.List[typing.Tuple[int, int, int, int, int, int]]]]
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
+    _receiver_index: typing.Optional[_ReceiverIndex]
+    """(position, finding player, location, item, receiving player, flags) by receiving player and item, built on first
+    use, so hints and collect don't have to search every location. Position keeps the order of iterating the store."""
+
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
+        self._receiver_index = None
 
         if not self:
             raise ValueError(f"Rejecting game with 0 players")
@@ -427,20 +523,34 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+    def _get_receiver_index(self) -> _ReceiverIndex:
+        if self._receiver_index is None:
+            receiver_index: _ReceiverIndex = {}
+            position = 0
+            for finding_player, check_data in self.items():
+                for location_id, (item_id, receiving_player, item_flags) in check_data.items():
+                    receiver_index.setdefault(receiving_player, {}).setdefault(item_id, []).append(
+                        (position, finding_player, location_id, item_id, receiving_player, item_flags))
+                    position += 1
+            self._receiver_index = receiver_index
+        return self._receiver_index
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
-        for finding_player, check_data in self.items():
-            for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-                if receiving_player in slots and item_id == seeked_item_id:
-                    yield finding_player, location_id, item_id, receiving_player, item_flags
+        receiver_index = self._get_receiver_index()
+        found = [entry for slot in slots for entry in receiver_index.get(slot, {}).get(seeked_item_id, ())]
+        if len(slots) > 1:
+            found.sort()
+        for _, finding_player, location_id, item_id, receiving_player, item_flags in found:
+            yield finding_player, location_id, item_id, receiving_player, item_flags
 
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
         import collections
         all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
-        for source_slot, location_data in self.items():
-            for location_id, values in location_data.items():
-                if values[1] == slot:
-                    all_locations[source_slot].add(location_id)
+        found = [entry for entries in self._get_receiver_index().get(slot, {}).values() for entry in entries]
+        found.sort()
+        for _, source_slot, location_id, *_ in found:
+            all_locations[source_slot].add(location_id)
         return all_locations
 
     def get_checked(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int
@@ -510,6 +620,125 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+multidata_format_version = 4
+"""format of the .archipelago files written by encode_multidata, 3 and older are a single compressed pickle"""
+multidata_split_sections: frozenset[str] = frozenset(("slot_data",))
+"""multidata sections that are stored as a section per key, so each slot's slot_data can be decoded on its own"""
+
+_SectionIndex = dict[typing.Any, "tuple[int, int] | _SectionIndex"]
+
+
+class MultiDataSections(MutableMapping[typing.Any, typing.Any]):
+    """
+    Multidata of format 4, which decodes each section when it is first accessed, so readers only pay for what they use.
+    The file starts with the format version and the length of the index, followed by the index of where each section
+    is and the sections themselves, every one of them a zlib compressed pickle.
+    """
+    _buffer: memoryview
+    _sections: dict[typing.Any, tuple[int, int] | _SectionIndex | None]
+    """where each section is in the buffer, None for sections that were assigned after loading"""
+    _decoded: dict[typing.Any, typing.Any]
+
+    def __init__(self, buffer: memoryview, index: _SectionIndex) -> None:
+        self._buffer = buffer
+        self._sections = dict(index)
+        self._decoded = {}
+
+    @classmethod
+    def decode(cls, data: bytes | bytearray | memoryview) -> MultiDataSections:
+        """Reads the index of data, without copying data or decoding any of its sections."""
+        buffer = memoryview(data)
+        if buffer[0] != multidata_format_version:
+            raise ValueError(f"Expected multidata format {multidata_format_version}, got {buffer[0]}.")
+        index_size = int.from_bytes(buffer[1:5], "little")
+        index = restricted_loads(zlib.decompress(buffer[5:5 + index_size]))
+        return cls(buffer[5 + index_size:], index)
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        location = self._sections[key]
+        if isinstance(location, dict):
+            value = MultiDataSections(self._buffer, location)
+        else:
+            offset, size = location
+            value = restricted_loads(zlib.decompress(self._buffer[offset:offset + size]))
+        self._decoded[key] = value
+        return value
+
+    def __setitem__(self, key: typing.Any, value: typing.Any) -> None:
+        self._decoded[key] = value
+        self._sections[key] = None
+
+    def __delitem__(self, key: typing.Any) -> None:
+        del self._sections[key]
+        self._decoded.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sections
+
+    def __iter__(self) -> Iterator[typing.Any]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def detach(self) -> None:
+        """
+        Copies the sections that were not decoded yet out of the buffer this was decoded from, so keeping this around
+        does not keep the whole buffer alive.
+        """
+        sections: list[memoryview] = []
+        size = 0
+        for key, location in self._sections.items():
+            if isinstance(location, dict):
+                self[key].detach()
+            elif location is not None and key not in self._decoded:
+                offset, section_size = location
+                sections.append(self._buffer[offset:offset + section_size])
+                self._sections[key] = size, section_size
+                size += section_size
+        self._buffer = memoryview(b"".join(sections))
+
+    def get_encoded(self, key: typing.Any) -> memoryview | None:
+        """
+        Returns the stored section of key, unless it was decoded, as decoded values could have been modified since.
+        """
+        location = self._sections[key]
+        if key in self._decoded or not isinstance(location, tuple):
+            return None
+        offset, size = location
+        return self._buffer[offset:offset + size]
+
+
+def encode_multidata(multidata: Mapping[str, typing.Any]) -> bytes:
+    """
+    Encodes multidata in the current format, see MultiDataSections.
+    Sections of MultiDataSections that were never decoded are copied over without decoding them.
+    """
+    sections: list[bytes | memoryview] = []
+    size = 0
+
+    def add_sections(mapping: Mapping[typing.Any, typing.Any], split_sections: frozenset[str]) -> _SectionIndex:
+        nonlocal size
+        index: _SectionIndex = {}
+        for key in mapping:
+            if key in split_sections:
+                index[key] = add_sections(mapping[key], frozenset())
+                continue
+            section = mapping.get_encoded(key) if isinstance(mapping, MultiDataSections) else None
+            if section is None:
+                section = zlib.compress(restricted_dumps(mapping[key]), 9)
+            index[key] = size, len(section)
+            sections.append(section)
+            size += len(section)
+        return index
+
+    encoded_index = zlib.compress(restricted_dumps(add_sections(multidata, multidata_split_sections)), 9)
+    return b"".join((bytes([multidata_format_version]), len(encoded_index).to_bytes(4, "little"), encoded_index,
+                     *sections))
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
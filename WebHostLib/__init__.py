@@ -50,6 +50,8 @@ app.config["JOB_TIME"] = 600
 app.config["MAX_ROOM_TIMEOUT"] = 259200
 # memory limit for generator processes in bytes
 app.config["GENERATOR_MEMORY_LIMIT"] = 4294967296
+# size in bytes of the stored multidata and data packages each process keeps decoded for trackers
+app.config["TRACKER_DATA_CACHE_SIZE"] = 32 * 1024 * 1024
 
 # waitress uses one thread for I/O, these are for processing of views that then get sent
 # archipelago.gg uses gunicorn + nginx; ignoring this option
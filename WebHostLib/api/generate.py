@@ -61,6 +61,8 @@ def generate_api():
                 meta=json.dumps(meta), state=STATE_QUEUED,
                 owner=session["_id"])
             commit()
+            from WebHostLib.autolauncher import wake_autogen
+            wake_autogen()
             return {"text": f"Generation of seed {gen.id} started successfully.",
                     "detail": gen.id,
                     "encoded": app.url_map.converters["suuid"].to_url(None, gen.id),
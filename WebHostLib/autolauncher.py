@@ -3,18 +3,34 @@ from __future__ import annotations
 import json
 import logging
 import multiprocessing
+import time
+import traceback
 import typing
-from datetime import timedelta
+from collections import deque
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from multiprocessing.connection import Connection
 from threading import Event, Thread
-from typing import Any
+from typing import Any, ClassVar
 from uuid import UUID
 
-from pony.orm import db_session, select, commit, PrimaryKey, desc
+from pony.orm import db_session, select, commit, PrimaryKey
 
 from Utils import restricted_loads, utcnow
 from .locker import Locker, AlreadyRunningException
 
 _stop_event = Event()
+_autohost_wakeup = Event()
+_autogen_wakeup = Event()
+_autohost_woken = False
+_autogen_woken = False
+poll_interval: float = 0.1
+"""seconds between checks for work that didn't wake the schedulers, like work queued by other processes"""
+woken_poll_interval: float = 1.0
+"""
+poll_interval of a scheduler that was woken by this process before, which shows that the web frontend runs in this
+process and wakes it when queuing work, so polling is only a fallback
+"""
 
 
 def stop() -> None:
@@ -23,6 +39,22 @@ def stop() -> None:
     stop_event = _stop_event
     _stop_event = Event()  # new event for new threads
     stop_event.set()
+    _autohost_wakeup.set()
+    _autogen_wakeup.set()
+
+
+def wake_autohost() -> None:
+    """Lets autohost start rooms right away, after their activity was committed in this process."""
+    global _autohost_woken
+    _autohost_woken = True
+    _autohost_wakeup.set()
+
+
+def wake_autogen() -> None:
+    """Lets autogen start generations right away, after they were queued and committed in this process."""
+    global _autogen_woken
+    _autogen_woken = True
+    _autogen_wakeup.set()
 
 
 def handle_generation_success(seed_id):
@@ -52,23 +84,113 @@ def _mp_gen_game(
         setproctitle(f"Generator (idle)")
 
 
-def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, timeout: int|None) -> None:
+class _GeneratorJob(typing.NamedTuple):
+    process: multiprocessing.process.BaseProcess
+    connection: Connection
+    deadline: float | None
+
+
+class GeneratorPool:
+    """
+    Runs every generation in a fresh process, so a generation that exceeds JOB_TIME can be killed.
+    Where available, these processes are forked from a forkserver that imported the worlds once,
+    sharing them copy-on-write instead of importing them again for every generation.
+    """
+    preload: ClassVar[list[str]] = [__name__]
+    """modules for the forkserver to import, this one imports the worlds through .generate"""
+    size: int
+    job_time: int | None
+    pending: deque[tuple[UUID, dict, dict[str, Any], Any]]
+    running: dict[UUID, _GeneratorJob]
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.config = config
+        self.size = config["GENERATORS"]
+        self.job_time = config["JOB_TIME"]
+        self.pending = deque()
+        self.running = {}
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("forkserver")
+            self.context.set_forkserver_preload(self.preload)
+        else:  # no fork on Windows, every generation has to import the worlds itself
+            self.context = multiprocessing.get_context("spawn")
+
+    @staticmethod
+    def run(connection: Connection, config: dict[str, Any], gen_options: dict, meta: dict[str, Any], owner,
+            sid: UUID) -> None:
+        """Runs a single generation in its own process and sends the result or the traceback back to the pool"""
+        init_generator(config)
+        try:
+            # the pool kills this process when it runs out of time, so gen_game doesn't need a timeout
+            result = (True, _mp_gen_game(gen_options, meta=meta, owner=owner, sid=sid))
+        except BaseException as e:
+            result = (False, "".join(traceback.format_exception(e)))
+        connection.send(result)
+        connection.close()
+
+    def start(self) -> None:
+        """Starts the forkserver now, so the first generation doesn't have to wait for the worlds to be imported."""
+        if self.context.get_start_method() == "forkserver":
+            from multiprocessing import forkserver
+            forkserver.ensure_running()
+
+    def submit(self, sid: UUID, gen_options: dict, meta: dict[str, Any], owner) -> None:
+        self.pending.append((sid, gen_options, meta, owner))
+        self.collect()
+
+    def collect(self) -> None:
+        """Reaps finished and timed out generations, then starts pending ones in the free slots."""
+        now = time.monotonic()
+        for sid, job in list(self.running.items()):
+            if job.process.is_alive() and not job.connection.poll():
+                if job.deadline is None or now < job.deadline:
+                    continue
+                job.process.kill()
+                job.process.join()
+                logging.error(f"Generation timed out for seed {sid}")
+                set_generation_error(sid, timeout_error_message +
+                                     f"TimeoutError: Generation did not finish within {self.job_time} seconds.")
+            else:
+                try:
+                    success, result = job.connection.recv()
+                except EOFError:
+                    job.process.join()
+                    success, result = False, f"Generator exited with code {job.process.exitcode}"
+                    set_generation_error(sid, result)
+                job.process.join()
+                if success:
+                    handle_generation_success(result)
+                else:
+                    logging.error(f"Generation failed for seed {sid}:\n{result}")
+            job.connection.close()
+            del self.running[sid]
+
+        while self.pending and len(self.running) < self.size:
+            sid, gen_options, meta, owner = self.pending.popleft()
+            receiver, sender = self.context.Pipe(duplex=False)
+            process = self.context.Process(target=self.run, name=f"Generator {sid}", daemon=True,
+                                           args=(sender, self.config, gen_options, meta, owner, sid))
+            process.start()
+            sender.close()
+            deadline = None if self.job_time is None else time.monotonic() + self.job_time
+            self.running[sid] = _GeneratorJob(process, receiver, deadline)
+
+    def close(self) -> None:
+        """Kills running generations, they are resumed on the next start as they are still marked as started."""
+        for job in self.running.values():
+            job.process.kill()
+            job.process.join()
+            job.connection.close()
+        self.running.clear()
+        self.pending.clear()
+
+
+def launch_generator(pool: GeneratorPool, generation: Generation) -> None:
     try:
         meta = json.loads(generation.meta)
         options = restricted_loads(generation.options)
         logging.info(f"Generating {generation.id} for {len(options)} players")
-        pool.apply_async(
-            _mp_gen_game,
-            (options,),
-            {
-                "meta": meta,
-                "sid": generation.id,
-                "owner": generation.owner,
-                "timeout": timeout,
-            },
-            handle_generation_success,
-            handle_generation_failure,
-        )
+        pool.submit(generation.id, options, meta, generation.owner)
     except Exception as e:
         generation.state = STATE_ERROR
         commit()
@@ -113,6 +235,59 @@ def cleanup():
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+class ActiveRooms:
+    """
+    Rooms with recent activity, kept up to date by querying only rooms that had activity since the last refresh,
+    instead of all active rooms every time autohost checks which rooms to start.
+    """
+    overlap: ClassVar[timedelta] = timedelta(seconds=10)
+    """how far before the last refresh to query again, for activity that was committed after it"""
+    full_refresh_interval: ClassVar[timedelta] = timedelta(minutes=1)
+    max_room_timeout: timedelta
+    rooms: dict[UUID, tuple[datetime, int, int]]
+    """last_activity, timeout and last_port by room id"""
+    last_refresh: datetime | None
+    last_full_refresh: datetime | None
+
+    def __init__(self, max_room_timeout: int) -> None:
+        self.max_room_timeout = timedelta(seconds=max_room_timeout)
+        self.rooms = {}
+        self.last_refresh = None
+        self.last_full_refresh = None
+
+    def refresh(self, changed: Iterable[UUID] = ()) -> None:
+        """Loads rooms with new activity and the current state of the changed rooms. Needs a db_session."""
+        now = utcnow()
+        oldest = now - self.max_room_timeout
+        if self.last_full_refresh is None or now - self.last_full_refresh >= self.full_refresh_interval:
+            self.rooms.clear()
+            self.last_full_refresh = now
+            since = oldest
+        else:
+            since = max(oldest, self.last_refresh - self.overlap)
+        for room_id in changed:
+            room = Room.get(id=room_id)
+            if room:
+                self.rooms[room_id] = room.last_activity, room.timeout, room.last_port
+            else:
+                self.rooms.pop(room_id, None)
+        for room_id, last_activity, timeout, last_port in select(
+                (room.id, room.last_activity, room.timeout, room.last_port)
+                for room in Room if room.last_activity >= since):
+            self.rooms[room_id] = last_activity, timeout, last_port
+        self.last_refresh = now
+        for room_id in [room_id for room_id, (last_activity, _, _) in self.rooms.items() if last_activity < oldest]:
+            del self.rooms[room_id]
+
+    def to_host(self) -> list[UUID]:
+        """Returns the rooms that should be running, the ones that had a port before first."""
+        now = utcnow()
+        rooms = [(last_port or 0, room_id) for room_id, (last_activity, timeout, last_port) in self.rooms.items()
+                 if last_activity >= now - timedelta(seconds=timeout + 5)]
+        rooms.sort(key=lambda port_room: port_room[0], reverse=True)
+        return [room_id for _, room_id in rooms]
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
@@ -125,16 +300,16 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
-                while not stop_event.wait(0.1):
+                active_rooms = ActiveRooms(config["MAX_ROOM_TIMEOUT"])
+                while not stop_event.is_set():
+                    _autohost_wakeup.clear()
+                    # rooms set their last_activity into the past when shutting down, so those have to be reloaded
+                    shut_down = [room_id for hoster in hosters for room_id in hoster.collect_shut_down()]
                     with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= utcnow() - timedelta(
-                                seconds=config["MAX_ROOM_TIMEOUT"])).order_by(desc(Room.last_port))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                        active_rooms.refresh(shut_down)
+                    for room_id in active_rooms.to_host():
+                        hosters[room_id.int % len(hosters)].start_room(room_id)
+                    _autohost_wakeup.wait(woken_poll_interval if _autohost_woken else poll_interval)
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -148,9 +323,9 @@ def autogen(config: dict):
         try:
             with Locker("autogen"):
 
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
-                    job_time = config["JOB_TIME"]
+                generator_pool = GeneratorPool(config)
+                generator_pool.start()
+                try:
                     with db_session:
                         to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
 
@@ -161,19 +336,24 @@ def autogen(config: dict):
                                 if sid:
                                     generation.delete()
                                 else:
-                                    launch_generator(generator_pool, generation, timeout=job_time)
+                                    launch_generator(generator_pool, generation)
 
                             commit()
                         select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
 
-                    while not stop_event.wait(0.1):
+                    while not stop_event.is_set():
+                        _autogen_wakeup.clear()
                         with db_session:
                             # for update locks the database row(s) during transaction, preventing writes from elsewhere
                             to_start = select(
                                 generation for generation in Generation
                                 if generation.state == STATE_QUEUED).for_update()
                             for generation in to_start:
-                                launch_generator(generator_pool, generation, timeout=job_time)
+                                launch_generator(generator_pool, generation)
+                        generator_pool.collect()
+                        _autogen_wakeup.wait(woken_poll_interval if _autogen_woken else poll_interval)
+                finally:
+                    generator_pool.close()
         except AlreadyRunningException:
             logging.info("Autogen reports as already running, not starting another.")
 
@@ -204,9 +384,16 @@ class MultiworldInstance():
         process.start()
         self.process = process
 
-    def start_room(self, room_id):
+    def collect_shut_down(self) -> list[UUID]:
+        """Returns the rooms that shut down since the last call, so they can be started again."""
+        shut_down = []
         while not self.rooms_shutting_down.empty():
-            self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
+            room_id = self.rooms_shutting_down.get(block=True, timeout=None)
+            self.room_ids.remove(room_id)
+            shut_down.append(room_id)
+        return shut_down
+
+    def start_room(self, room_id):
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
@@ -228,4 +415,4 @@ class MultiworldInstance():
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
 from .customserver import run_server_process, get_static_server_data
-from .generate import gen_game
+from .generate import gen_game, set_generation_error, timeout_error_message
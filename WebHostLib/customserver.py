@@ -6,26 +6,26 @@ import datetime
 import functools
 import logging
 import multiprocessing
-import pickle
 import random
 import socket
 import threading
 import time
 import typing
 import sys
+from uuid import UUID
 
 import websockets
-from pony.orm import commit, db_session, select
+from pony.orm import commit, db_session, delete, select
 
 import Utils
 
 from MultiServer import (
-    Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert,
+    Context, SaveJournal, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert,
     server_per_message_deflate_factory,
 )
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, SaveRecord, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -37,11 +37,13 @@ class CustomClientMessageProcessor(ClientMessageProcessor):
         """
         if platform.lower().startswith("t"):  # twitch
             self.ctx.video[self.client.team, self.client.slot] = "Twitch", user
+            self.ctx.save_changes["video"].add((self.client.team, self.client.slot))
             self.ctx.save()
             self.output(f"Registered Twitch Stream https://www.twitch.tv/{user}")
             return True
         elif platform.lower().startswith("y"):  # youtube
             self.ctx.video[self.client.team, self.client.slot] = "Youtube", user
+            self.ctx.save_changes["video"].add((self.client.team, self.client.slot))
             self.ctx.save()
             self.output(f"Registered Youtube Stream for {user}")
             return True
@@ -89,25 +91,6 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    async def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            await self.main_loop.run_in_executor(None, self._process_db_commands, cmdprocessor)
-            try:
-                await asyncio.wait_for(self.exit_event.wait(), 5)
-            except asyncio.TimeoutError:
-                pass
-
-    def _process_db_commands(self, cmdprocessor):
-        with db_session:
-            commands = select(command for command in Command if command.room.id == self.room_id)
-            if commands:
-                for command in commands:
-                    self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                    command.delete()
-                commit()
-
     @db_session
     def load(self, room_id: int):
         self.room_id = room_id
@@ -159,28 +142,107 @@ class WebHostContext(Context):
         self.saving = enabled
         if self.saving:
             with db_session:
-                savegame_data = Room.get(id=self.room_id).multisave
+                savegame_data = Room.get(id=self.room_id).get_save_journal()
                 if savegame_data:
-                    self.set_save(restricted_loads(savegame_data))
+                    self.set_save(SaveJournal.decode(savegame_data))
             self._start_async_saving(atexit_save=False)
-        asyncio.create_task(self.listen_to_db_commands())
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
-        room = Room.get(id=self.room_id)
-        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-        room.multisave = pickle.dumps(self.get_save())
-        # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
-        if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
-            room.last_activity = Utils.utcnow()
+        self.record_save(compact=exit_save)
+        with self.save_journal.write_lock:
+            start_over, data = self.save_journal.unwritten()
+            try:
+                room = Room.get(id=self.room_id)
+                if start_over:
+                    room.multisave = data
+                    delete(record for record in SaveRecord if record.room == room)
+                elif data:
+                    SaveRecord(room=room, data=data)
+                # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
+                if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
+                    room.last_activity = Utils.utcnow()
+                commit()
+            except Exception:
+                self.save_journal.rewrite()
+                raise
         return True
 
     def get_save(self) -> dict:
         d = super(WebHostContext, self).get_save()
-        d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
+        d["video"] = tuple((tuple(playerslot), videodata) for playerslot, videodata in self.video.items())
         return d
 
 
+class DBCommandDispatcher:
+    """
+    Polls the Command table for all rooms hosted by a server process and hands each command to its room,
+    so that the process makes one query per poll, instead of one per room.
+    """
+    min_interval: float
+    max_interval: float
+    """seconds between polls, starting at min_interval after commands came in and doubling up to max_interval"""
+    processors: typing.Dict[UUID, DBCommandProcessor]
+
+    def __init__(self, min_interval: float = 1, max_interval: float = 5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.processors = {}
+        self._wakeup = asyncio.Event()
+
+    def register(self, ctx: WebHostContext) -> None:
+        self.processors[ctx.room_id] = DBCommandProcessor(ctx)
+        self.wake()  # pick up commands sent while the room was starting
+
+    def unregister(self, ctx: WebHostContext) -> None:
+        self.processors.pop(ctx.room_id, None)
+
+    def wake(self) -> None:
+        """Polls right away, instead of at the end of the current interval."""
+        self._wakeup.set()
+
+    @staticmethod
+    def fetch(room_ids: typing.AbstractSet[UUID]) -> typing.List[typing.Tuple[UUID, str]]:
+        """Removes and returns the commands for room_ids, in the order they were sent."""
+        commands: typing.List[typing.Tuple[UUID, str]] = []
+        with db_session:
+            for command in select(command for command in Command if command.room.id in room_ids).order_by(Command.id):
+                commands.append((command.room.id, command.commandtext))
+                command.delete()
+            if commands:
+                commit()
+        return commands
+
+    def dispatch(self, commands: typing.Iterable[typing.Tuple[UUID, str]]) -> None:
+        for room_id, commandtext in commands:
+            processor = self.processors.get(room_id)
+            if processor:  # room may have shut down since
+                try:
+                    processor(commandtext)
+                except Exception as e:
+                    processor.ctx.logger.exception(e)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = self.max_interval
+        while True:
+            self._wakeup.clear()
+            if self.processors:
+                try:
+                    commands = await loop.run_in_executor(None, self.fetch, set(self.processors))
+                except Exception:
+                    # a failed poll, such as a database hiccup, must not stop command delivery for every room
+                    logging.exception("Could not fetch room commands")
+                    interval = self.max_interval
+                else:
+                    self.dispatch(commands)
+                    interval = self.min_interval if commands else min(interval * 2, self.max_interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+
 def get_random_port():
     return random.randint(49152, 65535)
 
@@ -291,6 +353,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    db_command_dispatcher = DBCommandDispatcher()
+    db_command_task = loop.create_task(db_command_dispatcher.run())  # keep a reference, tasks are weakly referenced
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
@@ -299,6 +363,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
                 ctx.init_save()
+                db_command_dispatcher.register(ctx)
                 assert ctx.server is None
                 try:
                     ctx.server = websockets.serve(
@@ -356,6 +421,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
+                    db_command_dispatcher.unregister(ctx)
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
@@ -102,6 +102,8 @@ def start_generation(options: dict[str, dict | str], meta: dict[str, Any]):
             return render_template("seedError.html", seed_error=meta["error"], details=details)
 
         commit()
+        from .autolauncher import wake_autogen
+        wake_autogen()
 
         return redirect(url_for("wait_seed", seed=gen.id))
     else:
@@ -152,6 +154,7 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
         args.skip_output = False
         args.spoiler_only = False
         args.csv_output = False
+        args.profile = False
         args.sprite = dict.fromkeys(range(1, args.multi+1), None)
         args.sprite_pool = dict.fromkeys(range(1, args.multi+1), None)
 
@@ -180,29 +183,13 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
         return thread.result(timeout)
     except concurrent.futures.TimeoutError as e:
         if sid:
-            with db_session:
-                gen = Generation.get(id=sid)
-                if gen is not None:
-                    gen.state = STATE_ERROR
-                    meta = json.loads(gen.meta)
-                    meta["error"] = ("Allowed time for Generation exceeded, " +
-                                     "please consider generating locally instead. " +
-                                     format_exception(e))
-                    gen.meta = json.dumps(meta)
-                    commit()
+            set_generation_error(sid, timeout_error_message + format_exception(e))
     except (KeyboardInterrupt, SystemExit):
         # don't update db, retry next time
         raise
     except BaseException as e:
         if sid:
-            with db_session:
-                gen = Generation.get(id=sid)
-                if gen is not None:
-                    gen.state = STATE_ERROR
-                    meta = json.loads(gen.meta)
-                    meta["error"] = format_exception(e)
-                    gen.meta = json.dumps(meta)
-                    commit()
+            set_generation_error(sid, format_exception(e))
         raise
     finally:
         # free resources claimed by thread pool, if possible
@@ -211,6 +198,20 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
         thread_pool.shutdown(wait=False, cancel_futures=True)
 
 
+timeout_error_message = "Allowed time for Generation exceeded, please consider generating locally instead. "
+
+
+def set_generation_error(sid: UUID, error: str) -> None:
+    with db_session:
+        gen = Generation.get(id=sid)
+        if gen is not None:
+            gen.state = STATE_ERROR
+            meta = json.loads(gen.meta)
+            meta["error"] = error
+            gen.meta = json.dumps(meta)
+            commit()
+
+
 @app.route('/wait/<suuid:seed>')
 def wait_seed(seed: UUID):
     seed_id = seed
@@ -176,6 +176,8 @@ def new_room(seed: UUID):
         abort(404)
     room = Room(seed=seed, owner=session["_id"], tracker=uuid4())
     commit()
+    from .autolauncher import wake_autohost
+    wake_autohost()
     return redirect(url_for("host_room", room=room.id))
 
 
@@ -244,6 +246,9 @@ def host_room(room: UUID):
         # we only set last_activity if needed, otherwise parallel access on /room will cause an internal server error
         # due to "pony.orm.core.OptimisticCheckError: Object Room was updated outside of current transaction"
         room.last_activity = now  # will trigger a spinup, if it's not already running
+        commit()
+        from .autolauncher import wake_autohost
+        wake_autohost()
 
     browser_tokens = "Mozilla", "Chrome", "Safari"
     automated = ("update" in request.args
@@ -1,6 +1,6 @@
 from datetime import datetime
 from uuid import UUID, uuid4
-from pony.orm import Database, PrimaryKey, Required, Set, Optional, buffer, LongStr
+from pony.orm import Database, PrimaryKey, Required, Set, Optional, buffer, LongStr, select
 
 from Utils import utcnow
 
@@ -28,12 +28,27 @@ class Room(db.Entity):
     commands = Set('Command')
     seed = Required('Seed', index=True)
     multisave = Optional(buffer, lazy=True)
+    save_records = Set('SaveRecord')
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
     # Port special value -1 means the server errored out. Another attempt can be made with a page refresh
     last_port = Optional(int, default=lambda: 0)
 
+    def get_save_journal(self) -> bytes:
+        """multisave followed by the SaveRecords appended to it, as read by MultiServer.SaveJournal.decode"""
+        if not self.multisave:
+            return b""
+        records = select(record for record in SaveRecord if record.room == self).order_by(SaveRecord.id)
+        return b"".join((self.multisave, *(record.data for record in records)))
+
+
+class SaveRecord(db.Entity):
+    # changes appended to the journal in Room.multisave, so that saving them does not rewrite all of multisave
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    data = Required(buffer)
+
 
 class Seed(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
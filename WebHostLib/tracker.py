@@ -1,14 +1,15 @@
 import datetime
 import collections
+import threading
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
 from flask import make_response, render_template, request, Request, Response
 from werkzeug.exceptions import abort
 
-from MultiServer import Context, get_saving_second
+from MultiServer import Context, SaveJournal, get_saving_second
 from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
 from Utils import restricted_loads, KeyedDefaultDict, utcnow
 from . import app, cache
@@ -24,6 +25,83 @@ TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
 
 
+class DecodedDataCache:
+    """Process-wide LRU cache of the data that doesn't change while a room is played, so tracker requests only have to
+    decode the multisave. Entries are weighed by the size of the data they were decoded from, which takes up several
+    times as much memory once decoded. Cached values are shared between requests and must not be modified.
+    """
+    size: int
+    _entries: "collections.OrderedDict[Hashable, Tuple[Any, int]]"
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], Tuple[Any, int]]) -> Any:
+        """Returns the cached value for key, or stores the value and its size returned by load."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+        value, size = load()  # outside the lock, a duplicate load is cheaper than blocking all other trackers
+        max_size = app.config["TRACKER_DATA_CACHE_SIZE"]
+        if size <= max_size:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = value, size
+                    self.size += size
+                    while self.size > max_size:
+                        _, (_, evicted_size) = self._entries.popitem(last=False)
+                        self.size -= evicted_size
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+decoded_data_cache = DecodedDataCache()
+
+
+def _load_multidata(room: Room) -> Tuple[Dict[str, Any], int]:
+    multidata = room.seed.multidata
+    return Context.decompress(multidata), len(multidata)
+
+
+class GameLookupTables(NamedTuple):
+    item_id_to_name: Dict[int, str]
+    location_id_to_name: Dict[int, str]
+    item_name_to_id: Dict[str, int]
+    location_name_to_id: Dict[str, int]
+
+
+def _load_game_lookup_tables(checksum: str) -> Tuple[GameLookupTables, int]:
+    data = GameDataPackage.get(checksum=checksum).data
+    game_package = restricted_loads(data)
+    return GameLookupTables(
+        {id: name for name, id in game_package["item_name_to_id"].items()},
+        {id: name for name, id in game_package["location_name_to_id"].items()},
+        game_package["item_name_to_id"],
+        game_package["location_name_to_id"],
+    ), len(data)
+
+
+class IdToNameLookup(collections.ChainMap):
+    """Looks up names in a table shared through decoded_data_cache, naming unknown ids without adding them to it."""
+    unknown: str
+
+    def __init__(self, names: Dict[int, str], unknown: str):
+        super().__init__({}, names)  # anything set goes into the first mapping, which belongs to one request
+        self.unknown = unknown
+
+    def __missing__(self, code: int) -> str:
+        return self.unknown.format(code)
+
+
 def _cache_results(func: Callable) -> Callable:
     """Stores the results of any computationally expensive methods after the initial call in TrackerData.
     If called again, returns the cached result instead, as results will not change for the lifetime of TrackerData.
@@ -55,8 +133,9 @@ class TrackerData:
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        self._multidata = decoded_data_cache.get(("multidata", room.seed.id), lambda: _load_multidata(room))
+        multisave = room.get_save_journal()
+        self._multisave = SaveJournal.decode(multisave) if multisave else {}
         self._tracker_cache = {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
@@ -70,15 +149,15 @@ class TrackerData:
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
         })
         for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
+            checksum = game_package["checksum"]
+            tables: GameLookupTables = decoded_data_cache.get(("datapackage", checksum),
+                                                              lambda: _load_game_lookup_tables(checksum))
+            self.item_id_to_name[game] = IdToNameLookup(tables.item_id_to_name, "Unknown Item (ID: {})")
+            self.location_id_to_name[game] = IdToNameLookup(tables.location_id_to_name, "Unknown Location (ID: {})")
 
             # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+            self.item_name_to_id[game] = tables.item_name_to_id
+            self.location_name_to_id[game] = tables.location_name_to_id
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
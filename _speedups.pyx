@@ -1,6 +1,5 @@
 #cython: language_level=3
 #distutils: language = c
-#distutils: depends = intset.h
 
 """
 Provides faster implementation of some core parts.
@@ -28,30 +27,11 @@ ctypedef uint32_t ap_player_t  # on AMD64 this is faster (and smaller) than 64bi
 ctypedef uint32_t ap_flags_t
 ctypedef int64_t ap_id_t
 
+ctypedef uint32_t ap_entry_index_t  # index into entries, 4 billion locations ought to be enough
+
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
 
-# configure INTSET for player
-cdef extern from *:
-    """
-    #define INTSET_NAME ap_player_set
-    #define INTSET_TYPE uint32_t  // has to match ap_player_t
-    """
-
-# create INTSET for player
-cdef extern from "intset.h":
-    """
-    #undef INTSET_NAME
-    #undef INTSET_TYPE
-    """
-    ctypedef struct ap_player_set:
-        pass
-
-    ap_player_set* ap_player_set_new(size_t bucket_count) nogil
-    void ap_player_set_free(ap_player_set* set) nogil
-    bint ap_player_set_add(ap_player_set* set, ap_player_t val) nogil
-    bint ap_player_set_contains(ap_player_set* set, ap_player_t val) nogil
-
 
 cdef struct LocationEntry:
     # layout is so that
@@ -92,6 +72,10 @@ cdef class LocationStore:
     cdef size_t entry_count
     cdef IndexEntry* sender_index  # 16KB/1000 players
     cdef size_t sender_index_size
+    # entries by receiver and item, built on first use, since only hints and collect need it
+    cdef ap_entry_index_t* receiver_order  # 400KB/100k items, entries sorted by (receiver, item, sender, location)
+    cdef IndexEntry* receiver_index  # 16KB/1000 players, ranges of receiver_order
+    cdef size_t receiver_index_size
     cdef list _keys  # ~36KB/1000 players, speed up iter (28 per int + 8 per list entry)
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
@@ -101,6 +85,8 @@ cdef class LocationStore:
         from sys import getsizeof
         size = getsizeof(self) + getsizeof(self._mem) + getsizeof(self._len) \
                 + sizeof(LocationEntry) * self.entry_count + sizeof(IndexEntry) * self.sender_index_size
+        if self.receiver_index:
+            size += sizeof(ap_entry_index_t) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
         size += getsizeof(self._keys) + getsizeof(self._items) + getsizeof(self._proxies)
         size += sum(sizeof(key) for key in self._keys)
         size += sum(sizeof(item) for item in self._items)
@@ -117,6 +103,7 @@ cdef class LocationStore:
 
         # iterate over everything to get all maxima and validate everything
         cdef size_t max_sender = INVALID_SIZE  # keep track of highest used player id for indexing
+        cdef size_t max_receiver = 0
         cdef size_t sender_count = 0
         cdef size_t count = 0
         for sender, locations in locations_dict.items():
@@ -131,6 +118,7 @@ cdef class LocationStore:
                 receiver = data[1]
                 if receiver < 1 or receiver > MAX_PLAYER_ID:
                     raise ValueError(f"Invalid player id {receiver} for item")
+                max_receiver = max(max_receiver, receiver)
                 count += 1
             sender_count += 1
 
@@ -143,6 +131,8 @@ cdef class LocationStore:
 
         if not count:
             warnings.warn("Game has no locations")
+        if count > <ap_entry_index_t>(-1):
+            raise ValueError("Too many locations")
 
         # allocate the arrays and invalidate index (0xff...)
         if count:
@@ -187,9 +177,41 @@ cdef class LocationStore:
             self._raw_proxies[i] = <PyObject*>proxy
 
         self.sender_index_size = max_sender + 1
+        self.receiver_index_size = max_receiver + 1
         self.entry_count = count
         self._len = sender_count
 
+    cdef void _build_receiver_index(self):
+        if self.receiver_index:
+            return
+        cdef size_t i
+        cdef LocationEntry* entry
+        # entries are sorted by sender and location already, so sorting by index keeps that order for equal items
+        order = sorted([(self.entries[i].receiver, self.entries[i].item, i) for i in range(self.entry_count)])
+        if self.entry_count:
+            self.receiver_order = <ap_entry_index_t*>self._mem.alloc(self.entry_count, sizeof(ap_entry_index_t))
+        receiver_index = <IndexEntry*>self._mem.alloc(self.receiver_index_size, sizeof(IndexEntry))
+        for i in range(self.entry_count):
+            self.receiver_order[i] = order[i][2]
+            entry = self.entries + self.receiver_order[i]
+            if not receiver_index[entry.receiver].count:
+                receiver_index[entry.receiver].start = i
+            receiver_index[entry.receiver].count += 1
+        self.receiver_index = receiver_index  # only set once complete
+
+    cdef size_t _find_receiver_item(self, size_t receiver, ap_id_t item) nogil:
+        # binary search for the first entry of item in receiver's range of receiver_order
+        cdef size_t l = self.receiver_index[receiver].start
+        cdef size_t r = l + self.receiver_index[receiver].count
+        cdef size_t m
+        while l < r:
+            m = (l + r) // 2
+            if self.entries[self.receiver_order[m]].item < item:
+                l = m + 1
+            else:
+                r = m
+        return l
+
     # fake dict access
     def __len__(self) -> int:
         return self._len
@@ -217,45 +239,45 @@ cdef class LocationStore:
     # specialized accessors
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
-        cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef size_t receiver
+        cdef size_t i
+        cdef size_t end
+        cdef LocationEntry* entry
+        self._build_receiver_index()
+        found: List[int] = []
+        for slot in slots:
+            if slot < 1 or slot >= self.receiver_index_size:
+                continue
+            receiver = slot
+            end = self.receiver_index[receiver].start + self.receiver_index[receiver].count
+            i = self._find_receiver_item(receiver, item)
+            while i < end and self.entries[self.receiver_order[i]].item == item:
+                found.append(self.receiver_order[i])
+                i += 1
+        if len(slots) > 1:
+            found.sort()  # in order of sender and location, as if all entries were searched
+        for i in found:
+            entry = self.entries + i
+            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
-        cdef ap_player_t receiver = slot
+        cdef size_t receiver
+        cdef size_t i
+        cdef LocationEntry* entry
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        if slot < 1 or slot >= self.receiver_index_size:
+            return all_locations
+        self._build_receiver_index()
+        receiver = slot
+        start = self.receiver_index[receiver].start
+        found: List[int] = [self.receiver_order[i] for i in range(start, start + self.receiver_index[receiver].count)]
+        found.sort()  # in order of sender and location, as if all entries were searched
+        for i in found:
+            entry = self.entries + i
+            sender: int = entry.sender
+            if sender not in all_locations:
+                all_locations[sender] = set()
+            all_locations[sender].add(entry.location)
         return all_locations
 
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
@@ -0,0 +1,252 @@
+"""
+Collects where generation spends its time when running with `Generate.py --profile`.
+
+The report covers the wall time of each generation stage, the time each world spends in its generation steps,
+sweeps for advancements, each fill_restrictive call, the access rules that took the longest to evaluate in total and
+the process' memory high-water mark at the end of each stage. When tracemalloc is tracing, e.g. by running with
+`python -X tracemalloc`, it also covers the peak memory allocated by Python during each stage.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any, TYPE_CHECKING, TypedDict
+
+from BaseClasses import CollectionRule, CollectionState, Entrance, Location
+
+if TYPE_CHECKING:
+    from BaseClasses import MultiWorld
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+__all__ = ["GenerationProfiler"]
+
+
+class StageReport(TypedDict):
+    name: str
+    time: float
+    max_rss: int | None
+    """high-water mark of the process' resident memory at the end of the stage, including all earlier stages"""
+    peak_traced_memory: int | None
+    """peak memory allocated by Python during the stage, if tracemalloc is tracing"""
+
+
+class FillReport(TypedDict):
+    name: str
+    time: float
+    rounds: int
+    swaps: int
+    placed: int
+    unplaced: int
+
+
+class RuleReport(TypedDict):
+    player: int
+    game: str
+    spot: str
+    calls: int
+    time: float
+
+
+def _max_rss() -> int | None:
+    """Returns the process' resident memory high-water mark in bytes, if it can be determined on this platform."""
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # reported in bytes on macOS, but in kibibytes everywhere else
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def _peak_traced_memory() -> int | None:
+    """Returns the peak memory allocated by Python since the last call in bytes, if tracemalloc is tracing."""
+    if tracemalloc.is_tracing():
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        return peak
+    return None
+
+
+class _TimedRule:
+    """Wraps an access rule, adding up the time it takes to evaluate."""
+    __slots__ = ("rule", "calls", "time")
+
+    def __init__(self, rule: CollectionRule) -> None:
+        self.rule = rule
+        self.calls = 0
+        self.time = 0.0
+
+    def __call__(self, state: CollectionState) -> bool:
+        start = time.perf_counter()
+        try:
+            return self.rule(state)
+        finally:
+            self.time += time.perf_counter() - start
+            self.calls += 1
+
+
+class GenerationProfiler:
+    """
+    Attached to a MultiWorld as MultiWorld.profiler to collect timings while it generates.
+
+    Stages are sequential, each one lasting until the next one begins. Everything else is recorded by the parts of
+    generation it measures, so this only has to be created and written out at the end.
+    """
+    multiworld: MultiWorld
+    top_rules: int
+    """how many of the slowest access rules to list in the report"""
+    stages: list[StageReport]
+    world_calls: dict[str, dict[int | None, float]]
+    """time spent in each World method, by method name and player. Stage methods are recorded without a player."""
+    sweep_count: int
+    sweep_time: float
+    fills: list[FillReport]
+    rules: dict[Location | Entrance, _TimedRule]
+
+    def __init__(self, multiworld: MultiWorld, top_rules: int = 25) -> None:
+        self.multiworld = multiworld
+        self.top_rules = top_rules
+        self.stages = []
+        self.world_calls = defaultdict(lambda: defaultdict(float))
+        self.sweep_count = 0
+        self.sweep_time = 0.0
+        self.fills = []
+        self.rules = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._stage_name: str | None = None
+        self._stage_start = self._start
+        _peak_traced_memory()  # only count what the first stage allocates towards its peak
+
+    def begin_stage(self, name: str) -> None:
+        """Ends the current stage, if any, and starts timing the next one."""
+        now = time.perf_counter()
+        if self._stage_name:
+            self.stages.append({"name": self._stage_name, "time": now - self._stage_start, "max_rss": _max_rss(),
+                                "peak_traced_memory": _peak_traced_memory()})
+        self._stage_name = name
+        self._stage_start = now
+
+    def record_world_call(self, method: Callable[..., Any], player: int | None, taken: float) -> None:
+        name = method.__name__ if player else method.__qualname__
+        # worlds with isolated stages run their steps concurrently
+        with self._lock:
+            self.world_calls[name][player] += taken
+
+    def record_sweep(self, taken: float) -> None:
+        with self._lock:
+            self.sweep_count += 1
+            self.sweep_time += taken
+
+    def record_fill(self, name: str, taken: float, rounds: int, swaps: int, placed: int, unplaced: int) -> None:
+        with self._lock:
+            self.fills.append({"name": name, "time": taken, "rounds": rounds, "swaps": swaps, "placed": placed,
+                               "unplaced": unplaced})
+
+    def instrument_rules(self) -> None:
+        """Starts timing the access rules of all locations and entrances that have one."""
+        spots: list[Location | Entrance] = [*self.multiworld.get_locations(), *self.multiworld.get_entrances()]
+        for spot in spots:
+            if spot.access_rule is not type(spot).access_rule and spot not in self.rules:
+                timed_rule = self.rules[spot] = _TimedRule(spot.access_rule)
+                spot.access_rule = timed_rule
+
+    def restore_rules(self) -> None:
+        """Puts back the original access rules, keeping the timings collected so far."""
+        for spot, timed_rule in self.rules.items():
+            # rules that got replaced after being instrumented are left alone
+            if spot.access_rule is timed_rule:
+                spot.access_rule = timed_rule.rule
+
+    def report(self) -> dict[str, Any]:
+        self.begin_stage("")
+        self._stage_name = None
+        multiworld = self.multiworld
+        worlds: dict[int, float] = defaultdict(float)
+        for player_times in self.world_calls.values():
+            for player, taken in player_times.items():
+                if player:
+                    worlds[player] += taken
+        rule_times: dict[int, float] = defaultdict(float)
+        for spot, timed_rule in self.rules.items():
+            rule_times[spot.player] += timed_rule.time
+        slowest_rules: list[RuleReport] = [
+            {"player": spot.player, "game": multiworld.game[spot.player], "spot": spot.name,
+             "calls": timed_rule.calls, "time": timed_rule.time}
+            for spot, timed_rule in sorted(self.rules.items(), key=lambda spot_rule: spot_rule[1].time,
+                                           reverse=True)[:self.top_rules]
+        ]
+        return {
+            "seed": multiworld.seed_name,
+            "total_time": time.perf_counter() - self._start,
+            "players": {player: {"name": multiworld.player_name[player], "game": multiworld.game[player]}
+                        for player in multiworld.player_ids},
+            "stages": self.stages,
+            "world_calls": {name: {str(player) if player else "stage": taken for player, taken in times.items()}
+                            for name, times in self.world_calls.items()},
+            "world_times": dict(worlds),
+            "sweeps": {"count": self.sweep_count, "time": self.sweep_time},
+            "fills": self.fills,
+            "rule_times": dict(rule_times),
+            "slowest_rules": slowest_rules,
+        }
+
+    @staticmethod
+    def summarize(report: dict[str, Any]) -> str:
+        """Turns a report into a human-readable summary, also one read back from its json file."""
+        # json turns the player keys into strings
+        players = {int(player): info for player, info in report["players"].items()}
+
+        def player_text(player: int) -> str:
+            return f"{players[player]['name']} ({players[player]['game']})"
+
+        lines = [f"Generation profile of seed {report['seed']}, {report['total_time']:.2f} seconds total.", "",
+                 "Stages:"]
+        for stage in report["stages"]:
+            memory = ""
+            if stage["peak_traced_memory"] is not None:
+                memory += f", peak allocated {stage['peak_traced_memory'] / 2 ** 20:.0f} MiB"
+            if stage["max_rss"] is not None:
+                memory += f", max RSS so far {stage['max_rss'] / 2 ** 20:.0f} MiB"
+            lines.append(f"  {stage['name']}: {stage['time']:.2f}s{memory}")
+
+        lines += ["", "Time spent in world generation steps:"]
+        for player, taken in sorted(report["world_times"].items(), key=lambda item: item[1], reverse=True):
+            player = int(player)
+            steps = sorted(((name, times[str(player)]) for name, times in report["world_calls"].items()
+                            if str(player) in times), key=lambda step: step[1], reverse=True)
+            lines.append(f"  {player_text(player)}: {taken:.2f}s "
+                         f"({', '.join(f'{name} {step_time:.2f}s' for name, step_time in steps[:3])})")
+
+        sweeps = report["sweeps"]
+        lines += ["", f"Sweeps for advancements: {sweeps['count']}, {sweeps['time']:.2f}s", "", "Fills:"]
+        for fill in report["fills"]:
+            if not fill["rounds"]:
+                continue  # nothing to place
+            lines.append(f"  {fill['name']}: {fill['time']:.2f}s, {fill['placed']} placed, {fill['unplaced']} unplaced,"
+                         f" {fill['rounds']} rounds, {fill['swaps']} swaps")
+
+        lines += ["", "Time spent in access rules during fill and progression balancing:"]
+        for player, taken in sorted(report["rule_times"].items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {player_text(int(player))}: {taken:.2f}s")
+        lines += ["", "Slowest access rules, including the rules they evaluate:"]
+        for rule in report["slowest_rules"]:
+            lines.append(f"  {rule['time']:.3f}s in {rule['calls']} calls: {rule['spot']} of "
+                         f"{player_text(rule['player'])}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str, outfilebase: str) -> None:
+        """Writes the report as json and as a summary into directory."""
+        report = self.report()
+        with open(os.path.join(directory, f"{outfilebase}_Profile.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.join(directory, f"{outfilebase}_Profile.txt"), "w", encoding="utf-8") as f:
+            f.write(self.summarize(report))
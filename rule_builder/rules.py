@@ -733,7 +733,7 @@ class Has(Rule[TWorld], game="Archipelago"):
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has
-            return state.prog_items[self.player][self.item_name] >= self.count
+            return state.prog_items[self.player].get(self.item_name, 0) >= self.count
 
         @override
         def item_dependencies(self) -> dict[str, set[int]]:
@@ -818,7 +818,7 @@ class HasAll(Rule[TWorld], game="Archipelago"):
             # implementation based on state.has_all
             player_prog_items = state.prog_items[self.player]
             for item in self.item_names:
-                if not player_prog_items[item]:
+                if not player_prog_items.get(item, 0):
                     return False
             return True
 
@@ -936,7 +936,7 @@ class HasAny(Rule[TWorld], game="Archipelago"):
             # implementation based on state.has_any
             player_prog_items = state.prog_items[self.player]
             for item in self.item_names:
-                if player_prog_items[item]:
+                if player_prog_items.get(item, 0):
                     return True
             return False
 
@@ -1056,7 +1056,7 @@ class HasAllCounts(Rule[TWorld], game="Archipelago"):
             # implementation based on state.has_all_counts
             player_prog_items = state.prog_items[self.player]
             for item, count in self.item_counts:
-                if player_prog_items[item] < count:
+                if player_prog_items.get(item, 0) < count:
                     return False
             return True
 
@@ -1179,7 +1179,7 @@ class HasAnyCount(Rule[TWorld], game="Archipelago"):
             # implementation based on state.has_any_count
             player_prog_items = state.prog_items[self.player]
             for item, count in self.item_counts:
-                if player_prog_items[item] >= count:
+                if player_prog_items.get(item, 0) >= count:
                     return True
             return False
 
@@ -1308,7 +1308,7 @@ class HasFromList(Rule[TWorld], game="Archipelago"):
             found = 0
             player_prog_items = state.prog_items[self.player]
             for item_name in self.item_names:
-                found += player_prog_items[item_name]
+                found += player_prog_items.get(item_name, 0)
                 if found >= self.count:
                     return True
             return False
@@ -1443,7 +1443,7 @@ class HasFromListUnique(Rule[TWorld], game="Archipelago"):
             found = 0
             player_prog_items = state.prog_items[self.player]
             for item_name in self.item_names:
-                found += player_prog_items[item_name] > 0
+                found += player_prog_items.get(item_name, 0) > 0
                 if found >= self.count:
                     return True
             return False
@@ -1552,7 +1552,7 @@ class HasGroup(Rule[TWorld], game="Archipelago"):
             found = 0
             player_prog_items = state.prog_items[self.player]
             for item_name in self.item_names:
-                found += player_prog_items[item_name]
+                found += player_prog_items.get(item_name, 0)
                 if found >= self.count:
                     return True
             return False
@@ -1626,7 +1626,7 @@ class HasGroupUnique(Rule[TWorld], game="Archipelago"):
             found = 0
             player_prog_items = state.prog_items[self.player]
             for item_name in self.item_names:
-                found += player_prog_items[item_name] > 0
+                found += player_prog_items.get(item_name, 0) > 0
                 if found >= self.count:
                     return True
             return False
@@ -687,6 +687,12 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class IsolatedStageWorkers(int):
+        """
+        Amount of threads to run generate_early, create_regions, create_items and set_rules in,
+        for worlds that declare these steps as isolated from other worlds. 1 runs every world one after another.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -696,6 +702,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    isolated_stage_workers: IsolatedStageWorkers = IsolatedStageWorkers(1)
     loglevel: str = "info"
     logtime: bool = False
 
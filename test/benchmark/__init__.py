@@ -5,3 +5,5 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import net_json
+    net_json.run_net_json_benchmark()
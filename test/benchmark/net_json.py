@@ -0,0 +1,113 @@
+def run_net_json_benchmark(iterations: int = 200) -> None:
+    """
+    Compare the json and orjson backends of NetUtils.encode and NetUtils.decode on typical server traffic:
+    ReceivedItems sent on connect and while playing, PrintJSON for item sends and hints, and the LocationChecks and
+    Bounce messages clients send.
+    """
+    import logging
+    import random
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    import NetUtils
+    from NetUtils import Hint, HintStatus, JSONMessagePart, NetworkItem
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    if not NetUtils.orjson:
+        logger.warning("orjson is not installed, only benchmarking the json module.")
+
+    rng = random.Random(0)
+    players = 50
+
+    def item_send(item: NetworkItem, receiver: int) -> typing.Dict[str, typing.Any]:
+        parts: typing.List[JSONMessagePart] = [
+            {"text": str(item.player), "type": "player_id"},
+            {"text": " sent "},
+            {"text": str(item.item), "player": receiver, "flags": item.flags, "type": "item_id"},
+            {"text": " to "},
+            {"text": str(receiver), "type": "player_id"},
+            {"text": " ("},
+            {"text": str(item.location), "player": item.player, "type": "location_id"},
+            {"text": ")"},
+        ]
+        return {"cmd": "PrintJSON", "data": parts, "type": "ItemSend", "receiving": receiver, "item": item}
+
+    def hint(hint_data: Hint) -> typing.Dict[str, typing.Any]:
+        parts: typing.List[JSONMessagePart] = [
+            {"text": "[Hint]: "},
+            {"text": str(hint_data.receiving_player), "type": "player_id"},
+            {"text": "'s "},
+            {"text": str(hint_data.item), "player": hint_data.receiving_player, "flags": hint_data.item_flags,
+             "type": "item_id"},
+            {"text": " is at "},
+            {"text": str(hint_data.location), "player": hint_data.finding_player, "type": "location_id"},
+            {"text": " in "},
+            {"text": str(hint_data.finding_player), "type": "player_id"},
+            {"text": ". "},
+            {"text": "(avoid)", "type": "hint_status", "hint_status": hint_data.status},
+        ]
+        return {"cmd": "PrintJSON", "data": parts, "type": "Hint", "receiving": hint_data.receiving_player,
+                "item": NetworkItem(hint_data.item, hint_data.location, hint_data.finding_player,
+                                    hint_data.item_flags),
+                "found": hint_data.found}
+
+    def network_item() -> NetworkItem:
+        return NetworkItem(rng.randrange(1, 1000), rng.randrange(1, 10000), rng.randrange(1, players + 1),
+                           rng.choice((0, 1, 2, 4)))
+
+    traffic: typing.Dict[str, typing.List[typing.List[typing.Dict[str, typing.Any]]]] = {
+        "ReceivedItems on connect": [
+            [{"cmd": "ReceivedItems", "index": 0, "items": [network_item() for _ in range(300)]}]
+            for _ in range(10)
+        ],
+        "ReceivedItems while playing": [
+            [{"cmd": "ReceivedItems", "index": rng.randrange(300), "items": [network_item()]}]
+            for _ in range(1000)
+        ],
+        "PrintJSON ItemSend": [
+            [item_send(network_item(), rng.randrange(1, players + 1))]
+            for _ in range(1000)
+        ],
+        "PrintJSON Hint": [
+            [hint(Hint(rng.randrange(1, players + 1), rng.randrange(1, players + 1), rng.randrange(1, 10000),
+                       rng.randrange(1, 1000), False, "", 1, HintStatus.HINT_AVOID))]
+            for _ in range(1000)
+        ],
+        "LocationChecks": [
+            [{"cmd": "LocationChecks", "locations": rng.sample(range(1, 10000), rng.randrange(1, 5))}]
+            for _ in range(1000)
+        ],
+        "Bounce DeathLink": [
+            [{"cmd": "Bounce", "tags": ["DeathLink"],
+              "data": {"time": 1700000000.123, "source": f"Player{rng.randrange(players)}", "cause": "fell"}}]
+            for _ in range(1000)
+        ],
+    }
+
+    backends = [("json", NetUtils._json_encode, NetUtils._json_decode)]
+    if NetUtils.orjson:
+        backends.append(("orjson", NetUtils._orjson_encode, NetUtils._orjson_decode))
+
+    for name, messages in traffic.items():
+        encoded = [NetUtils._json_encode(message) for message in messages]
+        for backend, encode, decode in backends:
+            assert [NetUtils._json_decode(encode(message)) for message in messages] == \
+                   [NetUtils._json_decode(data) for data in encoded], f"{backend} changed the encoding of {name}"
+            with TimeIt(f"{backend} encoding {iterations} x {len(messages)} {name}", logger):
+                for _ in range(iterations):
+                    for message in messages:
+                        encode(message)
+            with TimeIt(f"{backend} decoding {iterations} x {len(messages)} {name}", logger):
+                for _ in range(iterations):
+                    for data in encoded:
+                        decode(data)
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_net_json_benchmark()
@@ -464,6 +464,26 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
 
+    def test_location_overrides(self):
+        """Test that fill asks locations that override can_fill and can_reach through their own methods"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 3, 2)
+        items = player1.prog_items
+        locations = player1.locations
+
+        class RefusingLocation(Location):
+            def can_fill(self, state, item, check_access=True) -> bool:
+                return item is not items[1] and super().can_fill(state, item, check_access)
+
+        locations[0].can_reach = lambda state: False
+        locations[1].__class__ = RefusingLocation
+        multiworld.completion_condition[player1.id] = lambda state: True
+        fill_restrictive(multiworld, multiworld.state, locations.copy(), items.copy())
+
+        self.assertIsNone(locations[0].item)
+        self.assertEqual(locations[1].item, items[0])
+        self.assertEqual(locations[2].item, items[1])
+
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
         """Test that distribute_items_restrictive is deterministic"""
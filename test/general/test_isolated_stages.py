@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from BaseClasses import Item, ItemClassification, MultiWorld
+from worlds.AutoWorld import call_all
+from . import generate_test_multiworld
+
+
+class TestIsolatedStages(unittest.TestCase):
+    multiworld: MultiWorld
+
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(4)
+        self.multiworld.isolated_stage_workers = 4
+        for player, world in self.multiworld.worlds.items():
+            # player 3 is not isolated and has to run between the others, without changing the resulting itempool
+            world.isolated_stages = player != 3
+
+    def test_itempool_order(self) -> None:
+        """Tests that items added by concurrently running worlds end up in the same order as when run in order"""
+        for world in self.multiworld.worlds.values():
+            def create_items(player: int = world.player) -> None:
+                for i in range(50):
+                    time.sleep(0)  # give the other threads a chance to interleave their items
+                    self.multiworld.itempool.append(Item(f"Item {i}", ItemClassification.filler, None, player))
+            world.create_items = create_items
+
+        call_all(self.multiworld, "create_items")
+        self.assertEqual([(item.player, item.name) for item in self.multiworld.itempool],
+                         [(player, f"Item {i}") for player in self.multiworld.player_ids for i in range(50)])
+
+    def test_player_order(self) -> None:
+        """Tests that a non-isolated world sees what the worlds before it did, but not what the ones after it did"""
+        seen_players = []
+        for world in self.multiworld.worlds.values():
+            def create_items(player: int = world.player) -> None:
+                self.multiworld.itempool.append(Item("Item", ItemClassification.filler, None, player))
+            world.create_items = create_items
+        self.multiworld.worlds[3].create_items = \
+            lambda: seen_players.extend(item.player for item in self.multiworld.itempool)
+
+        call_all(self.multiworld, "create_items")
+        self.assertEqual(seen_players, [1, 2])
+        self.assertEqual([item.player for item in self.multiworld.itempool], [1, 2, 4])
+
+    def test_itempool_removal_forbidden(self) -> None:
+        """Tests that isolated worlds may not remove items from the itempool while running concurrently"""
+        self.multiworld.itempool.append(Item("Item", ItemClassification.filler, None, 1))
+        self.multiworld.worlds[4].create_items = self.multiworld.itempool.clear
+        with self.assertRaises(AssertionError):
+            call_all(self.multiworld, "create_items")
+
+    def test_global_random_forbidden(self) -> None:
+        """Tests that isolated worlds cannot use the multiworld's random while running concurrently"""
+        self.multiworld.worlds[1].create_items = lambda: self.multiworld.random.random()
+        with self.assertRaises(RuntimeError):
+            call_all(self.multiworld, "create_items")
+        self.assertTrue(self.multiworld.random.passthrough)
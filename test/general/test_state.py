@@ -1,7 +1,8 @@
 import unittest
 
+from BaseClasses import CollectionState, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +28,63 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestEntranceDependencyTracking(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.world = self.multiworld.worlds[1]
+        self.world.explicit_indirect_conditions = False
+        self.world.entrance_dependency_tracking = True
+        menu = self.multiworld.get_region("Menu", 1)
+        self.multiworld.regions += [Region(name, 1, self.multiworld) for name in ("Key Room", "Lamp Room", "Dark Room",
+                                                                                  "Vault")]
+        menu.connect(self.multiworld.get_region("Key Room", 1), rule=lambda state: state.has("Key", 1))
+        menu.connect(self.multiworld.get_region("Lamp Room", 1), rule=lambda state: state.has("Lamp", 1))
+        # depends on the reachability of a region that is not its parent
+        self.multiworld.get_region("Key Room", 1).connect(
+            self.multiworld.get_region("Dark Room", 1), rule=lambda state: state.can_reach_region("Lamp Room", 1))
+        menu.connect(self.multiworld.get_region("Vault", 1), rule=lambda state: state.has("Coin", 1, 2))
+
+    def assertReachable(self, state: CollectionState, *reachable: str) -> None:
+        for region in self.multiworld.get_regions():
+            with self.subTest(region=region.name):
+                self.assertEqual(region.can_reach(state), region.name in ("Menu", *reachable))
+
+    def test_reachability(self) -> None:
+        """Tests that only rechecking entrances whose reads changed still finds every reachable region"""
+        state = CollectionState(self.multiworld)
+        self.assertReachable(state)
+        entrance_reads = state.entrance_reads[1]
+        self.assertEqual(len(entrance_reads), 3)
+        self.assertTrue(all(reads is not None for reads in entrance_reads.values()))
+
+        state.add_item("Key", 1)
+        state.stale[1] = True
+        self.assertReachable(state, "Key Room")
+        state.add_item("Coin", 1)
+        state.stale[1] = True
+        self.assertReachable(state, "Key Room")
+
+        copied_state = state.copy()
+        copied_state.add_item("Lamp", 1)
+        copied_state.stale[1] = True
+        self.assertReachable(copied_state, "Key Room", "Lamp Room", "Dark Room")
+        self.assertReachable(state, "Key Room")
+
+        state.add_item("Coin", 1)
+        state.stale[1] = True
+        self.assertReachable(state, "Key Room", "Vault")
+
+    def test_untracked_reads(self) -> None:
+        """Tests that entrances whose access rule reads state in ways that cannot be recorded are always rechecked"""
+        vault_entrance = self.multiworld.get_entrance("Menu -> Vault", 1)
+        vault_entrance.access_rule = lambda state: state.prog_items[1].total() >= 2
+        state = CollectionState(self.multiworld)
+        self.assertReachable(state)
+        self.assertIsNone(state.entrance_reads[1][vault_entrance])
+
+        state.add_item("Coin", 1)
+        state.add_item("Key", 1)
+        state.stale[1] = True
+        self.assertReachable(state, "Key Room", "Vault")
@@ -0,0 +1,73 @@
+# Tests for the json and orjson backends of NetUtils.encode and NetUtils.decode
+import dataclasses
+import datetime
+import unittest
+import uuid
+
+import NetUtils
+from NetUtils import ClientStatus, Hint, HintStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType
+from Utils import Version
+
+sample_messages = [
+    [{"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3, 4), NetworkItem(5, -1, 0)]}],
+    [{"cmd": "Connected", "team": 0, "slot": 1, "players": [NetworkPlayer(0, 1, "Al\"ias\n", "Näme 中")],
+      "slot_info": {1: NetworkSlot("Name", "Game", SlotType.player),
+                    2: NetworkSlot("Group", "Game", SlotType.group, [1, 3])},
+      "missing_locations": {5, 6}, "checked_locations": frozenset()}],
+    [{"cmd": "PrintJSON", "type": "Hint", "data": [{"text": "\U0001F600", "hint_status": HintStatus.HINT_AVOID}],
+      "hint": Hint(1, 2, 3, 4, False, "", 1, HintStatus.HINT_PRIORITY), "status": ClientStatus.CLIENT_GOAL}],
+    [{"cmd": "Connect", "version": Version(0, 6, 2), "tags": ("DeathLink",), "items_handling": 7}],
+    [{"cmd": "SetReply", "key": "key", "value": {"1": [0.5, None, True], "\x00": 2 ** 70}, "original_value": 0}],
+]
+
+
+@unittest.skipUnless(NetUtils.orjson, "orjson is not installed")
+class TestOrjsonBackend(unittest.TestCase):
+    def test_encode(self) -> None:
+        for message in sample_messages:
+            with self.subTest(message=message):
+                self.assertEqual(NetUtils._orjson_encode(message), NetUtils._json_encode(message))
+
+    def test_encode_non_finite(self) -> None:
+        # orjson would write these as null
+        for message in ([{"cmd": "SetReply", "key": "key", "value": float("nan"), "original_value": None}],
+                        [{"cmd": "Bounce", "data": {"time": None, "values": (1.5, float("-inf"))}}],
+                        [{"cmd": "Bounce", "data": {float("inf"): None}}]):
+            with self.subTest(message=message):
+                self.assertEqual(NetUtils._orjson_encode(message), NetUtils._json_encode(message))
+
+    def test_encode_unsupported(self) -> None:
+        with self.assertRaises(TypeError):
+            NetUtils._orjson_encode([{"cmd": "Bounce", "data": object()}])
+
+    def test_encode_unsupported_natively(self) -> None:
+        # orjson can encode these, the json module can not
+        @dataclasses.dataclass
+        class Data:
+            value: int
+
+        for value in (Data(1), datetime.datetime(2000, 1, 1), datetime.date(2000, 1, 1), uuid.UUID(int=1)):
+            with self.subTest(value=value):
+                with self.assertRaises(TypeError):
+                    NetUtils._json_encode([{"cmd": "Bounce", "data": {"value": value}}])
+                with self.assertRaises(TypeError):
+                    NetUtils._orjson_encode([{"cmd": "Bounce", "data": {"value": value}}])
+
+    def test_encode_uuid_text(self) -> None:
+        message = [{"cmd": "Say", "text": str(uuid.UUID(int=1))}]
+        self.assertEqual(NetUtils._orjson_encode(message), NetUtils._json_encode(message))
+
+    def test_decode(self) -> None:
+        for message in sample_messages:
+            data = NetUtils._json_encode(message)
+            with self.subTest(data=data):
+                decoded = NetUtils._orjson_decode(data)
+                self.assertEqual(decoded, NetUtils._json_decode(data))
+                self.assertEqual(repr(decoded), repr(NetUtils._json_decode(data)))
+
+    def test_decode_json_module_only(self) -> None:
+        # accepted by the json module, but not by orjson
+        for data in ('[NaN]', '[18446744073709551616]', '"\\ud800"',
+                     '[{"cl\\u0061ss":"NetworkItem","item":1,"location":2,"player":3}]'):
+            with self.subTest(data=data):
+                self.assertEqual(repr(NetUtils._orjson_decode(data)), repr(NetUtils._json_decode(data)))
@@ -112,6 +112,17 @@ class Base:
             self.assertEqual(sorted(self.store.find_item(set(range(2048)), 13)),
                              [(1, 13, 13, 1, 0)])
 
+        def test_find_item_order(self) -> None:
+            # matches for several players come out in the order of iterating the store
+            for slots, item in (({3, 4, 5}, 99), ({1, 2}, 11), ({1, 2}, 12)):
+                expected = [(finding_player, location_id, item_id, receiving_player, flags)
+                            for finding_player, check_data in self.store.items()
+                            for location_id, (item_id, receiving_player, flags) in check_data.items()
+                            if item_id == item and receiving_player in slots]
+                self.assertEqual(list(self.store.find_item(slots, item)), expected)
+            # repeated lookups use the same index
+            self.assertEqual(list(self.store.find_item({3, 4, 5}, 99)), list(self.store.find_item({5, 4, 3}, 99)))
+
         def test_get_for_player(self) -> None:
             self.assertEqual(self.store.get_for_player(3), {4: {9}})
             self.assertEqual(self.store.get_for_player(1), {1: {13}, 2: {22, 23}})
@@ -0,0 +1,63 @@
+# Tests for the sectioned multidata format written by NetUtils.encode_multidata
+import unittest
+
+from NetUtils import Hint, HintStatus, MultiDataSections, NetworkSlot, SlotType, encode_multidata, \
+    multidata_format_version
+
+sample_multidata = {
+    "slot_data": {1: {"goal": 1, "options": {"a": [1, 2]}}, 2: {}},
+    "slot_info": {1: NetworkSlot("Player1", "Game", SlotType.player),
+                  2: NetworkSlot("Player2", "Other Game", SlotType.player)},
+    "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+    "locations": {1: {10: (20, 2, 1)}, 2: {11: (21, 1, 0)}},
+    "precollected_hints": {1: {Hint(2, 1, 10, 20, False, "", 1, HintStatus.HINT_PRIORITY)}, 2: set()},
+    "seed_name": "12345",
+    "datapackage": {"Game": {"checksum": "abc"}},
+}
+
+
+class TestMultiDataSections(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        data = encode_multidata(sample_multidata)
+        self.assertEqual(data[0], multidata_format_version)
+        multidata = MultiDataSections.decode(data)
+        self.assertEqual(list(multidata), list(sample_multidata))
+        self.assertIsInstance(multidata["slot_data"], MultiDataSections)
+        self.assertEqual(dict(multidata["slot_data"]), sample_multidata["slot_data"])
+        self.assertEqual({key: value for key, value in multidata.items() if key != "slot_data"},
+                         {key: value for key, value in sample_multidata.items() if key != "slot_data"})
+
+    def test_lazy_decode(self) -> None:
+        multidata = MultiDataSections.decode(encode_multidata(sample_multidata))
+        self.assertIn("locations", multidata)
+        self.assertNotIn("spheres", multidata)
+        self.assertEqual(multidata["slot_data"][2], {})
+        self.assertEqual(multidata._decoded.keys(), {"slot_data"})
+        self.assertEqual(multidata["slot_data"]._decoded.keys(), {2})
+
+    def test_modify(self) -> None:
+        multidata = MultiDataSections.decode(encode_multidata(sample_multidata))
+        multidata["datapackage"]["Game"]["version"] = 1
+        multidata["race_mode"] = 1
+        del multidata["connect_names"]
+        self.assertEqual(multidata.pop("locations"), sample_multidata["locations"])
+
+        reencoded = MultiDataSections.decode(encode_multidata(multidata))
+        self.assertEqual(list(reencoded), ["slot_data", "slot_info", "precollected_hints", "seed_name", "datapackage",
+                                           "race_mode"])
+        self.assertEqual(reencoded["datapackage"], {"Game": {"checksum": "abc", "version": 1}})
+        self.assertEqual(reencoded["race_mode"], 1)
+        self.assertEqual(dict(reencoded["slot_data"]), sample_multidata["slot_data"])
+
+    def test_copy_undecoded_sections(self) -> None:
+        data = encode_multidata(sample_multidata)
+        self.assertEqual(encode_multidata(MultiDataSections.decode(data)), data)
+
+    def test_detach(self) -> None:
+        data = bytearray(encode_multidata(sample_multidata))
+        slot_data = MultiDataSections.decode(data)["slot_data"]
+        self.assertEqual(slot_data[2], {})
+        slot_data.detach()
+        self.assertLess(len(slot_data._buffer), len(data))
+        data[:] = bytes(len(data))  # the shared buffer must not be read from anymore
+        self.assertEqual(dict(slot_data), sample_multidata["slot_data"])
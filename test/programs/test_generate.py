@@ -1,15 +1,18 @@
 # Tests for Generate.py (ArchipelagoGenerate.exe)
 
+import json
 import unittest
 import os
 import os.path
 import sys
+import zipfile
 
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 import Generate
 import Main
+from generation_profiler import GenerationProfiler, _TimedRule
 
 
 class TestGenerateMain(unittest.TestCase):
@@ -72,6 +75,26 @@ class TestGenerateMain(unittest.TestCase):
 
         self.assertOutput(self.output_tempdir.name)
 
+    def test_generate_profile(self):
+        sys.argv = [sys.argv[0], '--seed', '0', '--profile',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name]
+        multiworld = Main.main(*Generate.main())
+
+        self.assertOutput(self.output_tempdir.name)
+        with zipfile.ZipFile(next(Path(self.output_tempdir.name).glob('*.zip'))) as zf:
+            names = zf.namelist()
+            self.assertIn(f'AP_{multiworld.seed_name}_Profile.txt', names)
+            report = json.loads(zf.read(f'AP_{multiworld.seed_name}_Profile.json'))
+            # a report read back from json, with its player keys turned into strings, summarizes the same
+            self.assertEqual(GenerationProfiler.summarize(report).splitlines(),
+                             zf.read(f'AP_{multiworld.seed_name}_Profile.txt').decode().splitlines())
+        self.assertIn("fill", [stage["name"] for stage in report["stages"]])
+        self.assertTrue(report["fills"])
+        # the original access rules are put back once they no longer need to be timed
+        for location in multiworld.get_locations():
+            self.assertNotIsInstance(location.access_rule, _TimedRule)
+
     def test_generate_yaml(self):
         # override host.yaml
         from settings import get_settings
@@ -108,6 +131,7 @@ class TestGenerateWeights(TestGenerateMain):
     # don't need to run these tests
     test_generate_absolute = None
     test_generate_relative = None
+    test_generate_profile = None
 
     def test_generate_yaml(self):
         from settings import get_settings
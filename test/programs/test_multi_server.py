@@ -1,5 +1,18 @@
+import asyncio
+import datetime
+import pickle
+import random
+import threading
+import types
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+
+import websockets
+
+from MultiServer import Client, Context, DataPackageCache, SaveJournal, ServerCommandProcessor, modify_functions, \
+    process_client_cmd, send_items_to, send_new_items
+from NetUtils import Hint, HintStatus, MultiDataSections, NetworkItem, decode, encode, encode_multidata
+from Utils import VersionException
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +51,427 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    async def test_only_receivers(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.clients = {0: {}}
+        clients = {}
+        for slot in (1, 2, 3):
+            client = clients[slot] = Client(None, ctx)
+            client.team, client.slot = 0, slot
+            ctx.clients[0][slot] = [client]
+
+        send_items_to(ctx, 0, 2, NetworkItem(100, 1, 1, 0), NetworkItem(101, 2, 1, 0))
+        send_new_items(ctx)
+        self.assertEqual([list(endpoints) for endpoints, _ in ctx.outgoing_later], [[clients[2]]])
+        msgs = decode(ctx.outgoing_later[0][1])
+        self.assertEqual(msgs[0]["cmd"], "ReceivedItems")
+        self.assertEqual(len(msgs[0]["items"]), 2)
+        self.assertEqual(clients[2].send_index, 2)
+        self.assertFalse(ctx.new_item_receivers)
+
+        # nothing new to send
+        ctx.outgoing_later.clear()
+        send_new_items(ctx)
+        self.assertFalse(ctx.outgoing_later)
+
+
+class TestSaveJournal(unittest.TestCase):
+    @staticmethod
+    def make_save() -> dict:
+        return {
+            "version": 1,
+            "received_items": {(0, 1, True): [NetworkItem(100, 1, 2, 0)]},
+            "location_checks": {(0, 1): {1, 2}},
+            "hints": {(0, 1): set()},
+            "client_activity_timers": (((0, 1), 1.0),),
+            "random_state": (3, (1, 2, 3), None),
+            # large enough for the journal not to get compacted in these tests
+            "stored_data": {"a": [1], "filler": random.Random(0).randbytes(10000)},
+        }
+
+    def test_changes_get_appended(self) -> None:
+        journal = SaveJournal()
+        save = self.make_save()
+        self.assertTrue(journal.needs_snapshot)
+        journal.snapshot(save)
+        self.assertFalse(journal.needs_snapshot)
+        snapshot_size = len(journal.data)
+
+        save["received_items"][0, 1, True].append(NetworkItem(101, 2, 2, 0))
+        save["received_items"][0, 2, True] = [NetworkItem(102, 3, 1, 0)]
+        save["location_checks"][0, 1].add(3)
+        save["client_activity_timers"] = (((0, 1), 2.0), ((0, 2), 3.0))
+        save["random_state"] = (3, (4, 5, 6), None)
+        save["stored_data"]["a"].append(2)
+        save["stored_data"]["b"] = "new"
+        changes = journal.growth("received_items", save["received_items"])
+        self.assertEqual(changes, [("extend", "received_items", (0, 1, True), [NetworkItem(101, 2, 2, 0)]),
+                                   ("extend", "received_items", (0, 2, True), [NetworkItem(102, 3, 1, 0)])])
+        changes += journal.growth("location_checks", save["location_checks"])
+        changes += journal.replaced("random_state", save["random_state"])
+        changes += [("set", "client_activity_timers", (0, 1), 2.0), ("set", "client_activity_timers", (0, 2), 3.0),
+                    ("set", "stored_data", "a", [1, 2]), ("set", "stored_data", "b", "new")]
+        journal.append(changes)
+        self.assertGreater(len(journal.data), snapshot_size)
+        self.assertEqual(SaveJournal.decode(journal.data), save)
+
+        # nothing changed, nothing to append
+        size = len(journal.data)
+        journal.append(journal.growth("received_items", save["received_items"]) +
+                       journal.growth("location_checks", save["location_checks"]) +
+                       journal.replaced("random_state", save["random_state"]))
+        self.assertEqual(len(journal.data), size)
+
+        journal.append([("del", "stored_data", "b", None)])
+        del save["stored_data"]["b"]
+        self.assertEqual(SaveJournal.decode(journal.data), save)
+
+        journal.snapshot(save)
+        self.assertLess(len(journal.data), size)
+        self.assertEqual(SaveJournal.decode(journal.data), save)
+
+    def test_cut_off_record(self) -> None:
+        journal = SaveJournal()
+        save = self.make_save()
+        journal.snapshot(save)
+        complete = len(journal.data)
+        save["location_checks"][0, 1].add(3)
+        journal.append(journal.growth("location_checks", save["location_checks"]))
+        decoded = SaveJournal.decode(journal.data[:-1])
+        self.assertEqual(decoded["location_checks"], {(0, 1): {1, 2}})
+        self.assertEqual(SaveJournal.decode(journal.data[:complete])["location_checks"], {(0, 1): {1, 2}})
+
+    def test_context_changes(self) -> None:
+        """Verify that the changes marked by the server add up to what it would save from scratch."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.connect_names = {"Player1": (0, 1), "Player2": (0, 2)}
+        ctx.name_aliases[0, 2] = "Two"
+        # large enough for the journal not to get compacted in this test
+        ctx.stored_data["filler"] = random.Random(0).randbytes(10000)
+        self.assertTrue(ctx.record_save())
+
+        ctx.received_items[0, 1, True] = [NetworkItem(100, 1, 2, 0)]
+        ctx.location_checks[0, 2].add(1)
+        ctx.hints_used[0, 1] += 1
+        ctx.save_changes["hints_used"].add((0, 1))
+        ctx.name_aliases[0, 1] = "One"
+        del ctx.name_aliases[0, 2]
+        ctx.save_changes["name_aliases"].update(((0, 1), (0, 2)))
+        ctx.client_activity_timers[0, 1] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.save_changes["client_activity_timers"].add((0, 1))
+        ctx.stored_data["key"] = [1]
+        ctx.save_changes["stored_data"].add("key")
+        ctx.random.random()
+        ctx.hint_cost = 5
+        self.assertFalse(ctx.record_save())
+        self.assertEqual(SaveJournal.decode(ctx.save_journal.data), ctx.get_save())
+
+        size = len(ctx.save_journal.data)
+        self.assertFalse(ctx.record_save())
+        self.assertEqual(len(ctx.save_journal.data), size, "nothing changed, nothing to append")
+        self.assertTrue(ctx.record_save(compact=True))
+        self.assertEqual(SaveJournal.decode(ctx.save_journal.data), ctx.get_save())
+
+    def test_record_from_other_thread(self) -> None:
+        """Verify that recording from another thread, like the auto saver, keeps up with changes made on the loop."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        # large enough for the journal not to get compacted in this test
+        ctx.stored_data["filler"] = random.Random(0).randbytes(100000)
+        ctx.record_save()
+        recording_threads = set()
+        get_save_changes = ctx.get_save_changes
+
+        def record_thread(save_changes):
+            recording_threads.add(threading.current_thread())
+            return get_save_changes(save_changes)
+
+        ctx.get_save_changes = record_thread  # type: ignore
+
+        async def change_while_recording() -> None:
+            ctx.loop = asyncio.get_running_loop()
+            recorder = threading.Thread(target=lambda: [ctx.record_save() for _ in range(50)])
+            recorder.start()
+            i = 0
+            while recorder.is_alive():
+                ctx.received_items.setdefault((0, 1, True), []).append(NetworkItem(i, 1, 1, 0))
+                ctx.location_checks[0, 1].add(i)
+                ctx.stored_data[f"key {i % 7}"] = i
+                ctx.save_changes["stored_data"].add(f"key {i % 7}")
+                i += 1
+                await asyncio.sleep(0)
+
+        asyncio.run(change_while_recording())
+        self.assertEqual(recording_threads, {threading.current_thread()}, "changes are collected on the loop")
+        self.assertFalse(ctx.record_save())
+        self.assertEqual(SaveJournal.decode(ctx.save_journal.data), ctx.get_save())
+
+    def test_legacy_save(self) -> None:
+        save = self.make_save()
+        self.assertEqual(SaveJournal.decode(zlib.compress(pickle.dumps(save))), save)
+        self.assertEqual(SaveJournal.decode(pickle.dumps(save)), save)
+
+
+class TestDecompress(unittest.TestCase):
+    multidata = {"slot_data": {1: {"option": 1}}, "seed_name": "12345"}
+
+    def test_format_3(self) -> None:
+        self.assertEqual(Context.decompress(bytes([3]) + zlib.compress(pickle.dumps(self.multidata))), self.multidata)
+
+    def test_format_4(self) -> None:
+        multidata = Context.decompress(encode_multidata(self.multidata))
+        self.assertIsInstance(multidata, MultiDataSections)
+        self.assertEqual(multidata["seed_name"], "12345")
+        self.assertEqual(multidata["slot_data"][1], {"option": 1})
+
+    def test_newer_format(self) -> None:
+        with self.assertRaises(VersionException):
+            Context.decompress(bytes([5]) + encode_multidata(self.multidata)[1:])
+
+
+class TestHintIndex(unittest.TestCase):
+    def test_recheck_checked_location(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        hint = Hint(2, 1, 10, 100, False, status=HintStatus.HINT_PRIORITY)
+        other_hint = Hint(1, 1, 11, 101, False, status=HintStatus.HINT_PRIORITY)
+        ctx.hints[0, 1] = {hint, other_hint}
+        ctx.hints[0, 2] = {hint}
+        ctx.index_hints()
+        self.assertIs(ctx.get_hint(0, 1, 10), hint)
+        self.assertIsNone(ctx.get_hint(0, 2, 10), "hints are looked up by their finding player")
+
+        ctx.location_checks[0, 1].add(10)
+        changed = set()
+        ctx.recheck_location_hints(0, 1, [10], changed)
+        found_hint = hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        self.assertEqual(ctx.get_hint(0, 1, 10), found_hint)
+        self.assertEqual(ctx.hints[0, 1], {found_hint, other_hint})
+        self.assertEqual(ctx.hints[0, 2], {found_hint})
+        self.assertIs(ctx.get_hint(0, 1, 11), other_hint)
+
+
+class TestGetSphere(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertEqual(ctx.get_sphere(1, 10), -1, "no spheres available")
+
+        ctx.spheres = [{1: {10}, 2: {20}}, {1: {11}}, {2: {21, 20}}]
+        ctx.index_spheres()
+        for i, sphere in enumerate(ctx.spheres):
+            for player, location_ids in sphere.items():
+                for location_id in location_ids:
+                    self.assertEqual(ctx.get_sphere(player, location_id), min(
+                        j for j, other_sphere in enumerate(ctx.spheres) if location_id in other_sphere.get(player, ())))
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(3, 10)
+
+
+class TestDataPackageCache(unittest.TestCase):
+    def test_encode_response(self) -> None:
+        cache = DataPackageCache(max_size=2)
+        games = {
+            "Game \"A\"": {"item_name_to_id": {"Sword": 1}, "location_name_to_id": {"Chest": 2}, "checksum": "a"},
+            "Game B": {"item_name_to_id": {"Bow": 3}, "location_name_to_id": {"Pot": 4}, "checksum": "b"},
+            "Old Game": {"item_name_to_id": {"Böw": 5}, "location_name_to_id": {}},
+        }
+        for requested in (games, {}, {"Game B": games["Game B"]}):
+            self.assertEqual(cache.encode_response(requested),
+                             encode([{"cmd": "DataPackage", "data": {"games": requested}}]))
+        self.assertEqual(list(cache._encoded), [("Game \"A\"", "a"), ("Game B", "b")])
+
+        # least recently used entries are dropped first
+        cache.encode_game("Game C", {"item_name_to_id": {}, "location_name_to_id": {}, "checksum": "c"})
+        self.assertEqual(list(cache._encoded), [("Game B", "b"), ("Game C", "c")])
+
+
+class TestOutgoingQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_coalesce(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.clients = {0: {1: []}}
+        connected = asyncio.Event()
+        done = asyncio.Event()
+
+        async def handler(websocket) -> None:
+            client = Client(websocket, ctx)
+            client.auth, client.team, client.slot = True, 0, 1
+            ctx.endpoints.append(client)
+            ctx.clients[0][1].append(client)
+            connected.set()
+            await done.wait()
+
+        async with websockets.serve(handler, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with websockets.connect(f"ws://localhost:{port}") as websocket:
+                await connected.wait()
+                client = ctx.endpoints[0]
+                ctx.broadcast_all([{"cmd": "PrintJSON", "data": [{"text": "a"}]}])
+                await ctx.send_msgs(client, [{"cmd": "Bounced", "data": {}}, {"cmd": "Bounced", "data": {"b": 1}}])
+                ctx.broadcast([client], [])
+                ctx.broadcast_team(0, [{"cmd": "RoomUpdate", "hint_points": 1}])
+                self.assertEqual(len(ctx.outgoing[client]), 1, "messages are queued until the end of the iteration")
+                self.assertEqual(len(ctx.outgoing_later), 3)
+                # all of them arrive as one frame, with the broadcasts behind what was sent directly
+                self.assertEqual(decode(await websocket.recv()), [
+                    {"cmd": "Bounced", "data": {}},
+                    {"cmd": "Bounced", "data": {"b": 1}},
+                    {"cmd": "PrintJSON", "data": [{"text": "a"}]},
+                    {"cmd": "RoomUpdate", "hint_points": 1},
+                ])
+                self.assertFalse(ctx.outgoing)
+
+                await ctx.send_msgs(client, [{"cmd": "Bounced", "data": {"c": 2}}])
+                self.assertEqual(decode(await websocket.recv()), [{"cmd": "Bounced", "data": {"c": 2}}])
+                done.set()
+
+    async def test_closed_connection(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        client = Client(types.SimpleNamespace(open=True), ctx)
+        ctx.endpoints.append(client)
+        self.assertTrue(await ctx.send_msgs(client, [{"cmd": "Bounced", "data": {}}]))
+        # closed before the flush, so the flush disconnects it instead of sending
+        client.socket.open = False
+        ctx.flush_outgoing()
+        await asyncio.sleep(0)
+        self.assertNotIn(client, ctx.endpoints)
+        self.assertFalse(ctx.outgoing)
+        # the receive loop disconnecting it again afterwards does nothing
+        await ctx.disconnect(client)
+
+    async def test_stalled_connection(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.outgoing_buffer_limit = 100
+        aborted = []
+        transport = types.SimpleNamespace(get_write_buffer_size=lambda: 0, abort=lambda: aborted.append(True))
+        client = Client(types.SimpleNamespace(open=True, transport=transport), ctx)
+        ctx.endpoints.append(client)
+        self.assertTrue(await ctx.send_msgs(client, [{"cmd": "Bounced", "data": {}}]))
+        # not taking what was sent to it, so the flush disconnects it instead of buffering more
+        transport.get_write_buffer_size = lambda: 101
+        with self.assertLogs(ctx.logger, "WARNING"):
+            ctx.flush_outgoing()
+        await asyncio.sleep(0)
+        self.assertEqual(aborted, [True])
+        self.assertNotIn(client, ctx.endpoints)
+
+    def test_frame_size(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        msgs = [encode([{"cmd": "PrintJSON", "data": [{"text": str(i)}]}]) for i in range(3)]
+        ctx.outgoing_frame_size = 2 * len(msgs[0])
+        frames = ctx.join_encoded_msgs(msgs + ["[]"])
+        self.assertEqual(len(frames), 2)
+        self.assertTrue(all(len(frame) <= ctx.outgoing_frame_size for frame in frames))
+        self.assertEqual([msg for frame in frames for msg in decode(frame)], [decode(msg)[0] for msg in msgs])
+        # a single message too big for one frame is still sent as is
+        ctx.outgoing_frame_size = 1
+        self.assertEqual(ctx.join_encoded_msgs(msgs[:1]), (msgs[0],))
+        self.assertEqual(ctx.join_encoded_msgs(msgs), tuple(msgs))
+
+
+class TestBounceRouting(unittest.TestCase):
+    def test_bounce_targets(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.games = {1: "Game A", 2: "Game B", 3: "Game A"}
+        ctx.clients = {0: {1: [], 2: [], 3: []}, 1: {1: [], 2: [], 3: []}}
+        clients = {}
+        for team, slot, tags in ((0, 1, ["DeathLink"]), (0, 2, []), (0, 3, ["Tracker"]), (1, 1, ["DeathLink"])):
+            client = clients[team, slot] = Client(None, ctx)
+            client.auth, client.team, client.slot, client.tags = True, team, slot, tags
+            ctx.endpoints.append(client)
+            ctx.clients[team][slot].append(client)
+            ctx.index_client(client)
+
+        self.assertEqual(ctx.get_bounce_targets(0, {"Game A"}, set(), set()), {clients[0, 1], clients[0, 3]})
+        self.assertEqual(ctx.get_bounce_targets(0, set(), {"DeathLink"}, set()), {clients[0, 1]})
+        self.assertEqual(ctx.get_bounce_targets(1, {"Game B"}, {"DeathLink"}, {3}), {clients[1, 1]})
+        self.assertEqual(ctx.get_bounce_targets(0, {"Game B"}, {"Tracker"}, {1}),
+                         {clients[0, 1], clients[0, 2], clients[0, 3]})
+        self.assertEqual(ctx.get_bounce_targets(0, {"Game C"}, {"NoText"}, {4}), set())
+        self.assertEqual(ctx.get_bounce_targets(2, {"Game A"}, {"DeathLink"}, {1}), set())
+
+        # tags changed through ConnectUpdate
+        client = clients[0, 2]
+        ctx.unindex_client(client)
+        client.tags = ["DeathLink"]
+        ctx.index_client(client)
+        self.assertEqual(ctx.get_bounce_targets(0, set(), {"DeathLink"}, set()), {clients[0, 1], clients[0, 2]})
+
+        clients[0, 1].auth = False  # skip the left message
+        asyncio.run(ctx.disconnect(clients[0, 1]))
+        self.assertEqual(ctx.get_bounce_targets(0, {"Game A"}, {"DeathLink"}, {1}), {clients[0, 2], clients[0, 3]})
+
+
+class TestDeltaSetReply(unittest.IsolatedAsyncioTestCase):
+    async def test_deltas(self) -> None:
+        sent: list[tuple[Client, dict]] = []
+
+        class RecordingContext(Context):
+            async def send_msgs(self, endpoint, msgs) -> bool:
+                sent.extend((endpoint, msg) for msg in msgs)
+                return True
+
+            def broadcast(self, endpoints, msgs) -> None:
+                sent.extend((endpoint, decode(encode(msg))) for endpoint in endpoints for msg in msgs)
+
+        ctx = RecordingContext("", 0, "", "", 0, 0, False)
+        ctx.save = lambda *args, **kwargs: None
+        full_client, delta_client = Client(None, ctx), Client(None, ctx)
+        for slot, client in enumerate((full_client, delta_client), 1):
+            client.auth, client.team, client.slot = True, 0, slot
+        ctx.stored_data["inventory"] = [1]
+
+        await process_client_cmd(ctx, full_client, {"cmd": "SetNotify", "keys": ["inventory", "new"]})
+        await process_client_cmd(ctx, delta_client, {"cmd": "SetNotify", "keys": ["inventory", "new"],
+                                                     "deltas": True})
+        self.assertEqual(sent, [(delta_client, {"cmd": "SetReply", "key": "inventory", "value": [1], "version": 0}),
+                                (delta_client, {"cmd": "SetReply", "key": "new", "value": None, "version": 0})])
+        delta_value = {"inventory": [1], "new": None}
+        sent.clear()
+
+        for key, operations in (("inventory", [{"operation": "add", "value": [2, 3]}]),
+                                ("inventory", [{"operation": "update", "value": [3, 4]},
+                                               {"operation": "remove", "value": 1}]),
+                                ("new", [{"operation": "add", "value": 5}]),
+                                ("new", [{"operation": "mul", "value": 3}])):
+            await process_client_cmd(ctx, delta_client, {"cmd": "Set", "key": key, "operations": operations,
+                                                         "want_reply": True})
+            full_reply = next(msg for endpoint, msg in sent if endpoint is full_client)
+            delta_reply = next(msg for endpoint, msg in sent if endpoint is delta_client)
+            self.assertEqual(len(sent), 2, "the delta client gets only the delta, even with want_reply")
+            self.assertNotIn("version", full_reply)
+            self.assertEqual(delta_reply["version"], ctx.stored_data_versions[key])
+            if "value" in delta_reply:
+                delta_value[key] = delta_reply["value"]
+            else:
+                self.assertNotIn("original_value", delta_reply)
+                for operation in delta_reply["operations"]:
+                    delta_value[key] = modify_functions[operation["operation"]](delta_value[key],
+                                                                                operation["value"])
+            self.assertEqual(delta_value[key], full_reply["value"])
+            self.assertEqual(delta_value[key], ctx.stored_data[key])
+            sent.clear()
+        self.assertEqual(ctx.stored_data_versions, {"inventory": 2, "new": 2})
+
+        # back to whole values
+        await process_client_cmd(ctx, delta_client, {"cmd": "SetNotify", "keys": ["new"]})
+        await process_client_cmd(ctx, full_client, {"cmd": "Set", "key": "new",
+                                                    "operations": [{"operation": "add", "value": 1}]})
+        self.assertEqual([msg["value"] for _, msg in sent], [16, 16])
+
+    async def test_first_reply_order(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.save = lambda *args, **kwargs: None
+        setter, delta_client = Client(None, ctx), Client(None, ctx)
+        for slot, client in enumerate((setter, delta_client), 1):
+            client.auth, client.team, client.slot = True, 0, slot
+        await process_client_cmd(ctx, delta_client, {"cmd": "SetNotify", "keys": ["key"], "deltas": True})
+        await process_client_cmd(ctx, setter, {"cmd": "Set", "key": "key", "default": 0,
+                                               "operations": [{"operation": "add", "value": 1}]})
+        # subscribing again in the same iteration queues the whole value behind the pending delta
+        await process_client_cmd(ctx, delta_client, {"cmd": "SetNotify", "keys": ["key"], "deltas": True})
+        self.assertFalse(ctx.outgoing)
+        replies = [msg for endpoints, encoded in ctx.outgoing_later if delta_client in endpoints
+                   for msg in decode(encoded)]
+        self.assertEqual([reply["version"] for reply in replies], [0, 1, 1])
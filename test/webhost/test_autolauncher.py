@@ -0,0 +1,117 @@
+import datetime
+import json
+import time
+from uuid import uuid4
+
+from WebHostLib.autolauncher import GeneratorPool
+from . import TestBase
+
+
+class SlowGeneratorPool(GeneratorPool):
+    @staticmethod
+    def run(*args) -> None:
+        time.sleep(60)
+
+
+class TestActiveRooms(TestBase):
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Seed
+
+        super().setUp()
+        with db_session:
+            self.seed_id = Seed(multidata=b"", owner=uuid4()).id
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Seed
+
+        with db_session:
+            seed = Seed.get(id=self.seed_id)
+            for room in seed.rooms:
+                room.delete()
+            seed.delete()
+
+    def create_room(self, inactive_for: datetime.timedelta, last_port: int = 0):
+        from pony.orm import db_session
+        from Utils import utcnow
+        from WebHostLib.models import Room, Seed
+
+        with db_session:
+            seed = Seed.get(id=self.seed_id)
+            return Room(seed=seed, owner=seed.owner, tracker=uuid4(), last_port=last_port, timeout=60,
+                        last_activity=utcnow() - inactive_for).id
+
+    def test_refresh(self) -> None:
+        from pony.orm import db_session
+        from Utils import utcnow
+        from WebHostLib.autolauncher import ActiveRooms
+        from WebHostLib.models import Room
+
+        active_rooms = ActiveRooms(max_room_timeout=600)
+        active = self.create_room(datetime.timedelta(seconds=10))
+        with_port = self.create_room(datetime.timedelta(seconds=20), last_port=38281)
+        timed_out = self.create_room(datetime.timedelta(seconds=120))
+        self.create_room(datetime.timedelta(hours=1))
+        with db_session:
+            active_rooms.refresh()
+        self.assertEqual(active_rooms.to_host(), [with_port, active])
+        self.assertIn(timed_out, active_rooms.rooms)
+
+        # incremental refresh only queries recent activity
+        with db_session:
+            Room.get(id=timed_out).last_activity = utcnow()
+        new = self.create_room(datetime.timedelta())
+        with db_session:
+            active_rooms.refresh()
+        to_host = active_rooms.to_host()
+        self.assertEqual(to_host[0], with_port)
+        self.assertEqual(set(to_host[1:]), {active, timed_out, new})
+
+        # rooms move their last_activity into the past when shutting down, which only shows up for changed rooms
+        with db_session:
+            Room.get(id=active).last_activity = utcnow() - datetime.timedelta(hours=1)
+            active_rooms.refresh()
+            self.assertIn(active, active_rooms.to_host())
+            active_rooms.refresh([active])
+        self.assertNotIn(active, active_rooms.to_host())
+        self.assertNotIn(active, active_rooms.rooms)
+
+        # a full refresh drops everything that isn't active anymore
+        with db_session:
+            Room.get(id=timed_out).last_activity = utcnow() - datetime.timedelta(hours=1)
+        active_rooms.last_full_refresh -= ActiveRooms.full_refresh_interval
+        with db_session:
+            active_rooms.refresh()
+        self.assertEqual(active_rooms.to_host(), [with_port, new])
+
+
+class TestGeneratorPool(TestBase):
+    def test_timeout(self) -> None:
+        """Verify that generations exceeding JOB_TIME get killed and marked as failed, making room for the next."""
+        from pony.orm import db_session
+        from WebHostLib.models import Generation, STATE_ERROR, STATE_STARTED
+
+        with db_session:
+            first = Generation(options=b"", owner=uuid4(), state=STATE_STARTED).id
+            second = Generation(options=b"", owner=uuid4(), state=STATE_STARTED).id
+        pool = SlowGeneratorPool({"GENERATORS": 1, "JOB_TIME": 60})
+        self.addCleanup(pool.close)
+        pool.start()
+        pool.submit(first, {}, {}, None)
+        pool.submit(second, {}, {}, None)
+        self.assertEqual(list(pool.running), [first])
+        self.assertEqual(len(pool.pending), 1)
+
+        # run out of time
+        job = pool.running[first] = pool.running[first]._replace(deadline=time.monotonic())
+        pool.collect()
+        self.assertFalse(job.process.is_alive())
+        self.assertEqual(list(pool.running), [second])
+        self.assertFalse(pool.pending)
+        with db_session:
+            generation = Generation.get(id=first)
+            self.assertEqual(generation.state, STATE_ERROR)
+            self.assertIn("Allowed time for Generation exceeded", json.loads(generation.meta)["error"])
+            generation.delete()
+            Generation.get(id=second).delete()
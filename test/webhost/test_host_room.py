@@ -203,6 +203,63 @@ class TestHostFakeRoom(TestBase):
             commands = select(command for command in Command if command.room.id == self.room_id)  # type: ignore
             self.assertNotIn("/help", (command.commandtext for command in commands))
 
+    def test_db_command_dispatcher(self) -> None:
+        """Verify that the dispatcher only takes commands of its rooms and hands them to the right room in order."""
+        from pony.orm import db_session, select
+        from WebHostLib.customserver import DBCommandDispatcher
+        from WebHostLib.models import Command, Room
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            other_room = Room(seed=room.seed, owner=room.owner, tracker=uuid4())
+            other_room_id = other_room.id
+            Command(room=room, commandtext="/help")
+            Command(room=other_room, commandtext="/players")
+            Command(room=room, commandtext="/exit")
+
+        commands = DBCommandDispatcher.fetch({self.room_id})
+        self.assertEqual(commands, [(self.room_id, "/help"), (self.room_id, "/exit")])
+        with db_session:
+            remaining = select(command for command in Command)[:]
+            self.assertEqual([(command.room.id, command.commandtext) for command in remaining],
+                             [(other_room_id, "/players")])
+            remaining[0].delete()
+            Room.get(id=other_room_id).delete()
+
+        received = []
+        dispatcher = DBCommandDispatcher()
+        dispatcher.processors[self.room_id] = received.append  # type: ignore
+        dispatcher.dispatch(commands + [(other_room_id, "/players")])
+        self.assertEqual(received, ["/help", "/exit"])
+
+    def test_db_command_dispatcher_poll_error(self) -> None:
+        """Verify that the dispatcher logs a failed poll and keeps polling."""
+        import asyncio
+        from WebHostLib.customserver import DBCommandDispatcher
+
+        polls = []
+        received = []
+
+        def fetch(room_ids):
+            polls.append(room_ids)
+            if len(polls) == 1:
+                raise OSError("database went away")
+            return [(self.room_id, "/help")]
+
+        async def run_until_received() -> None:
+            dispatcher = DBCommandDispatcher(min_interval=0, max_interval=0)
+            dispatcher.fetch = fetch  # type: ignore
+            dispatcher.processors[self.room_id] = received.append  # type: ignore
+            task = asyncio.create_task(dispatcher.run())
+            while not received:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        with self.assertLogs(level="ERROR"):
+            asyncio.run(asyncio.wait_for(run_until_received(), 10))
+        self.assertGreaterEqual(len(polls), 2)
+        self.assertEqual(received[0], "/help")
+
     def test_logger_teardown(self) -> None:
         """Verify that room loggers are removed from the global logging manager."""
         from WebHostLib.customserver import tear_down_logging
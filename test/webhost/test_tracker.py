@@ -103,3 +103,78 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_tracker_data_cache(self) -> None:
+        """Verify that TrackerData reuses the decoded multidata and data packages of earlier requests."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData, decoded_data_cache
+
+        decoded_data_cache.clear()
+        self.addCleanup(decoded_data_cache.clear)
+        with db_session:
+            first = TrackerData(Room.get(id=self.room_id))
+            second = TrackerData(Room.get(id=self.room_id))
+        self.assertIs(first._multidata, second._multidata)
+        for game in first._multidata["datapackage"]:
+            self.assertIs(first.item_id_to_name[game].maps[-1], second.item_id_to_name[game].maps[-1])
+            self.assertIs(first.location_name_to_id[game], second.location_name_to_id[game])
+            # unknown ids are named without being added to the shared table
+            self.assertEqual(first.item_id_to_name[game][-1234], "Unknown Item (ID: -1234)")
+            self.assertNotIn(-1234, second.item_id_to_name[game])
+        self.assertEqual(decoded_data_cache.size, len(self.data) + sum(
+            len(pickle.dumps(game_data)) for game_data in first._multidata["datapackage"].values()))
+
+    def test_decoded_data_cache_eviction(self) -> None:
+        """Verify that the least recently used entries get evicted to stay within TRACKER_DATA_CACHE_SIZE."""
+        from WebHostLib.tracker import DecodedDataCache
+
+        cache = DecodedDataCache()
+        old_max_size = self.app.config["TRACKER_DATA_CACHE_SIZE"]
+        self.app.config["TRACKER_DATA_CACHE_SIZE"] = 10
+        self.addCleanup(self.app.config.__setitem__, "TRACKER_DATA_CACHE_SIZE", old_max_size)
+
+        self.assertEqual(cache.get("a", lambda: ("a", 4)), "a")
+        self.assertEqual(cache.get("b", lambda: ("b", 4)), "b")
+        self.assertEqual(cache.get("a", lambda: ("new a", 4)), "a")
+        self.assertEqual(cache.get("c", lambda: ("c", 4)), "c")  # evicts b
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.get("b", lambda: ("new b", 4)), "new b")  # evicts a
+        self.assertEqual(cache.get("c", lambda: ("new c", 4)), "c")
+        self.assertEqual(cache.get("too large", lambda: ("too large", 11)), "too large")
+        self.assertEqual(cache.size, 8)
+
+    def test_save_records(self) -> None:
+        """Verify that saving a room appends SaveRecords, which are read along with multisave until it compacts."""
+        import asyncio
+        import logging
+        from pony.orm import db_session, select
+        from MultiServer import SaveJournal
+        from WebHostLib.customserver import WebHostContext, get_static_server_data
+        from WebHostLib.models import Room, SaveRecord
+
+        async def make_context() -> WebHostContext:
+            return WebHostContext(get_static_server_data(), logging.getLogger("test_save_records"))
+
+        ctx = asyncio.run(make_context())
+        ctx.load(self.room_id)
+        # large enough for the journal not to get compacted by the changes below
+        ctx.stored_data["filler"] = os.urandom(10000)
+        self.assertTrue(ctx._save())
+        ctx.stored_data["key"] = 1
+        ctx.save_changes["stored_data"].add("key")
+        self.assertTrue(ctx._save())
+        ctx.name_aliases[0, 1] = "Alias"
+        ctx.save_changes["name_aliases"].add((0, 1))
+        self.assertTrue(ctx._save())
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            self.assertEqual(select(record for record in SaveRecord if record.room == room).count(), 2)
+            self.assertEqual(SaveJournal.decode(room.get_save_journal()), ctx.get_save())
+
+        self.assertTrue(ctx._save(exit_save=True))
+        with db_session:
+            room = Room.get(id=self.room_id)
+            self.assertEqual(select(record for record in SaveRecord if record.room == room).count(), 0)
+            self.assertEqual(SaveJournal.decode(room.get_save_journal()), ctx.get_save())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import pathlib
@@ -168,6 +169,8 @@ def _timed_call(method: Callable[..., Any], *args: Any,
     start = time.perf_counter()
     ret = method(*args)
     taken = time.perf_counter() - start
+    if multiworld and multiworld.profiler:
+        multiworld.profiler.record_world_call(method, player, taken)
     if taken > 1.0:
         if player and multiworld:
             perf_logger.info(f"Took {taken:.4f} seconds in {method.__qualname__} for player {player}, "
@@ -197,29 +200,90 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
+isolated_stage_methods: FrozenSet[str] = frozenset(("generate_early", "create_regions", "create_items", "set_rules"))
+"""Per-world generation steps that worlds with World.isolated_stages set may run concurrently for."""
+
+
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
-    for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
-        if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+    if multiworld.isolated_stage_workers > 1 and method_name in isolated_stage_methods \
+            and any(world.isolated_stages for world in multiworld.worlds.values()):
+        _call_all_isolated(multiworld, method_name, *args)
+    else:
+        for player in multiworld.player_ids:
+            prev_item_count = len(multiworld.itempool)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                _assert_no_duplicate_items(multiworld, player, multiworld.itempool[prev_item_count:])
 
     call_stage(multiworld, method_name, *args)
 
 
+def _call_all_isolated(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
+    """
+    Calls method_name of all worlds in player order, except that each run of consecutive worlds with isolated_stages
+    set is called concurrently. Every world still sees what the worlds before it did, and multiworld.itempool ends up
+    in the order that calling every world one after another would have produced.
+    """
+    with concurrent.futures.ThreadPoolExecutor(multiworld.isolated_stage_workers) as pool:
+        isolated_players: List[int] = []
+        for player in multiworld.player_ids:
+            if multiworld.worlds[player].isolated_stages:
+                isolated_players.append(player)
+                continue
+            if isolated_players:
+                _call_isolated(multiworld, pool, method_name, isolated_players, *args)
+                isolated_players = []
+            prev_item_count = len(multiworld.itempool)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                _assert_no_duplicate_items(multiworld, player, multiworld.itempool[prev_item_count:])
+        if isolated_players:
+            _call_isolated(multiworld, pool, method_name, isolated_players, *args)
+
+
+def _call_isolated(multiworld: "MultiWorld", pool: concurrent.futures.Executor, method_name: str,
+                   players: List[int], *args: Any) -> None:
+    """Calls method_name of the isolated worlds of players concurrently, keeping the items they add in player order."""
+    start_item_count = len(multiworld.itempool)
+    # isolated worlds have to use their own random, so forbid using the global one while they run
+    passthrough = multiworld.random.passthrough
+    multiworld.random.passthrough = False
+    try:
+        futures = [pool.submit(call_single, multiworld, method_name, player, *args) for player in players]
+        for future in futures:
+            # raises the exception of the lowest player first, like calling them one after another would
+            future.result()
+    finally:
+        multiworld.random.passthrough = passthrough
+
+    # each isolated world only appended its own items, in the order it would have without the others running
+    assert len(multiworld.itempool) >= start_item_count, \
+        f"Isolated worlds removed items from multiworld.itempool in {method_name}, they may only append to it."
+    new_items: Dict[int, List["Item"]] = {player: [] for player in players}
+    for item in multiworld.itempool[start_item_count:]:
+        assert item.player in new_items, \
+            f"Isolated world added item \"{item.name}\" of non-isolated player {item.player} in {method_name}."
+        new_items[item.player].append(item)
+    multiworld.itempool[start_item_count:] = [item for player in players for item in new_items[player]]
+    if __debug__:
+        for player in players:
+            _assert_no_duplicate_items(multiworld, player, new_items[player])
+
+
+def _assert_no_duplicate_items(multiworld: "MultiWorld", player: int, new_items: List["Item"]) -> None:
+    for i, item in enumerate(new_items):
+        for other in new_items[i+1:]:
+            assert item is not other, (
+                f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     world_types = {multiworld.worlds[player].__class__ for player in multiworld.player_ids}
     for world_type in sorted(world_types, key=lambda world: world.__name__):
         stage_callable = getattr(world_type, f"stage_{method_name}", None)
         if stage_callable:
-            _timed_call(stage_callable, multiworld, *args)
+            _timed_call(stage_callable, multiworld, *args, multiworld=multiworld)
 
 
 class WebWorld(metaclass=WebWorldRegister):
@@ -271,7 +335,13 @@ class WebWorld(metaclass=WebWorldRegister):
 
 class World(metaclass=AutoWorldRegister):
     """A World object encompasses a game's Items, Locations, Rules and additional data or functionality required.
-    A Game should have its own subclass of World in which it defines the required data structures."""
+    A Game should have its own subclass of World in which it defines the required data structures.
+
+    Generation calls the stage methods of all worlds one after another, in player order, with two exceptions:
+    generate_output always runs in a thread per world, and for worlds with isolated_stages set, generate_early,
+    create_regions, create_items and set_rules may run in threads alongside those of other such worlds.
+    Setting isolated_stages only declares those four methods safe to run concurrently. All other methods but
+    generate_output, including the class level stage_ methods, are still called one after another."""
 
     options_dataclass: ClassVar[Type[PerGameCommonOptions]] = PerGameCommonOptions
     """link your Options mapping"""
@@ -324,6 +394,18 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    isolated_stages: bool = False
+    """If True, generate_early, create_regions, create_items and set_rules of this world only modify the world itself
+    and its own regions, only add its own items to the multiworld's itempool and only use self.random.
+    The generator may then run these steps concurrently with those of other players, see isolated_stage_workers in the
+    generator settings. The resulting multiworld is the same as when running them one after another."""
+
+    entrance_dependency_tracking: bool = False
+    """Only used if explicit_indirect_conditions is False. If True, the items and regions each blocked entrance's access
+    rule reads are recorded when it is evaluated, and the entrance is only rechecked once one of those changed,
+    instead of rechecking every blocked entrance at every step.
+    Requires entrance access rules to only read state through the has/count methods and can_reach."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int